@@ -2,11 +2,18 @@
 A compilation of modules to assist in local processes during typesetting.
 """
 
+import metrics
+from history import show_history
 from lib import welcome_sequence, hor_bar
 from mod_01 import get_translations
 from mod_03 import process_rev_file
 from mod_04 import rename_files
 from mod_05 import compile_to_pdf
+from mod_06 import prepare_folders
+from mod_07 import package_submission
+from mod_08 import translate_jp
+from mod_09 import check_text_fit
+from mod_10 import inspect_psd_folder
 
 # App variables
 app_name = "Typesetting Tools"
@@ -14,11 +21,21 @@ app_ver = "1.00.01"
 date = "28 Dec 2025"
 email = "tlcpineda.projects@gmail.com"
 options = [
+    {
+        'menu': '[P]repare folders',
+        'shortkey': 'P',
+        'func': prepare_folders,
+    },
     {
         'menu': '[S]crape translations',
         'shortkey': 'S',
         'func': get_translations,
     },
+    {
+        'menu': '[F]it check of translations',
+        'shortkey': 'F',
+        'func': check_text_fit,
+    },
     {
         'menu': '[M]ark files for revision',
         'shortkey': 'M',
@@ -34,6 +51,26 @@ options = [
         'shortkey': 'C',
         'func': compile_to_pdf
     },
+    {
+        'menu': '[Q]A of PSD layers',
+        'shortkey': 'Q',
+        'func': inspect_psd_folder,
+    },
+    {
+        'menu': '[B]undle files for submission',
+        'shortkey': 'B',
+        'func': package_submission,
+    },
+    {
+        'menu': '[T]ranslate JP',
+        'shortkey': 'T',
+        'func': translate_jp,
+    },
+    {
+        'menu': '[H]istory of runs',
+        'shortkey': 'H',
+        'func': show_history,
+    },
     {
         'menu': "E[X]it and close window",
         'shortkey': 'X'
@@ -81,6 +118,8 @@ if __name__ == "__main__":
             func_selected = selected_option['func'] # requires input_path
 
             hor_bar(60, f"RUNNING : {func_selected.__name__}()")
-            func_selected()
+            with metrics.operation(func_selected.__name__):
+                func_selected()
+
             hor_bar(60, f"COMPLETE : {func_selected.__name__}()")
 
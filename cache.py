@@ -0,0 +1,220 @@
+"""
+Read-through cache on local disk, for input files in slow (eg cloud-synced) chapter folders; disabled by default.
+Files are keyed by path, size, and modification time, so a changed file is fetched again.
+Least recently used files are evicted above the size cap. A background prefetcher fetches the next pages of a chapter
+while the current one is processed; prefetched files are not evicted before they are read, or the operation ends.
+Hits (files cached by an earlier read), prefetched files read, and misses are displayed at the end of each operation.
+    TS_CACHE_DIR={path} - enable the cache, in this local folder;
+    TS_CACHE_MB={size} - size cap in MB; defaults to 4096.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import metrics
+from lib import copy_file
+
+cache_dir = os.environ.get("TS_CACHE_DIR", "")
+enabled = bool(cache_dir)
+size_cap = int(os.environ.get("TS_CACHE_MB", "4096")) * 1024 * 1024
+prefetch_workers = 2  # Number of files fetched concurrently in the background.
+
+_lock = threading.Lock()
+_fetching = {}  # Futures of files being fetched in the background, by cache path.
+_prefetched = (
+    set()
+)  # Files fetched in the background, not yet read; released at the end of each operation.
+_executor = None
+_current = ""  # The file last returned by local_path(); not evicted, as it may not be open yet.
+
+
+def cache_path(path: str) -> str:
+    """
+    The path of the cached copy of a file; keyed by path, size, and modification time.
+    """
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    return os.path.join(cache_dir, f"{digest}{os.path.splitext(path)[1].lower()}")
+
+
+def fetch(path: str, path_cache: str) -> str:
+    """
+    Copy a file to the cache, then evict least recently used files above the size cap.
+    """
+    with metrics.span("cache_fetch", file=os.path.basename(path)):
+        os.makedirs(cache_dir, exist_ok=True)
+        path_tmp = f"{path_cache}.{threading.get_ident()}.part"
+        copy_file(path, path_tmp)
+        os.replace(path_tmp, path_cache)
+
+    evict(keep=path_cache)
+
+    return path_cache
+
+
+def local_path(path: str) -> str:
+    """
+    The path to read a file from; the cached copy if the cache is enabled, fetched first on a miss.
+    :param path: The path of the file in the chapter folder
+    :return: The path of the cached copy; or path, if the cache is disabled, or fails
+    """
+    global _current
+
+    if not enabled:
+        return path
+
+    try:
+        path_cache = cache_path(path)
+
+        with _lock:
+            future = _fetching.get(path_cache)
+            _current = path_cache
+
+        if future:  # Being prefetched; wait for it.
+            future.result()
+
+        if os.path.exists(path_cache):
+            os.utime(path_cache)  # Most recently used.
+
+            with _lock:
+                prefetched = path_cache in _prefetched
+                _prefetched.discard(path_cache)
+
+            metrics.count("cache_prefetched" if prefetched else "cache_hits")
+
+            return path_cache
+
+        metrics.count("cache_misses")
+
+        return fetch(path, path_cache)
+
+    except OSError:  # Eg cache folder full, or not writable; read from the source.
+        return path
+
+
+def prefetch(paths: list) -> None:
+    """
+    Fetch files to the cache in the background, eg the next pages of the chapter.
+    :param paths: The paths of the files in the chapter folder
+    """
+    global _executor
+
+    if not enabled:
+        return
+
+    for path in paths:
+        try:
+            path_cache = cache_path(path)
+        except OSError:
+            continue
+
+        with _lock:
+            if path_cache in _fetching or os.path.exists(path_cache):
+                continue
+
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=prefetch_workers)
+
+            _fetching[path_cache] = _executor.submit(prefetch_file, path, path_cache)
+
+
+def prefetch_file(path: str, path_cache: str) -> None:
+    """
+    Fetch a file in the background; kept from eviction until read.
+    """
+    with _lock:
+        _prefetched.add(path_cache)
+
+    try:
+        fetch(path, path_cache)
+    except OSError:
+        with _lock:
+            _prefetched.discard(path_cache)
+
+        raise
+    finally:
+        with _lock:
+            _fetching.pop(path_cache, None)
+
+
+def evict(keep: str = "") -> None:
+    """
+    Delete the least recently used files until the cache is within the size cap.
+    :param keep: The path of a file not to be deleted, ie the file just fetched
+    """
+    with _lock:
+        entries = []
+
+        for entry in os.scandir(cache_dir):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total <= size_cap:
+                break
+
+            if path in (keep, _current) or path in _fetching or path in _prefetched:
+                continue
+
+            try:
+                os.remove(path)
+                total -= size
+                metrics.count("cache_evictions")
+            except OSError:  # Eg open in another process.
+                pass
+
+
+def report(name: str, work_time: float, counters: dict, notes: dict) -> None:
+    """
+    Display the hits, prefetched files read, and misses of the cache; end-of-operation hook registered with metrics.
+    The hit rate is of the files cached by an earlier read, ie not counting the prefetcher.
+    """
+    hits, misses = counters.get("cache_hits", 0), counters.get("cache_misses", 0)
+    prefetched = counters.get("cache_prefetched", 0)
+
+    if enabled and hits + prefetched + misses:
+        hit_rate = hits / (hits + prefetched + misses)
+        print(
+            f"\n<=> Cache : {hits} hits ({hit_rate:.0%}), {prefetched} prefetched, {misses} misses,"
+            f" {counters.get('cache_evictions', 0)} evicted."
+        )
+
+
+def release(name: str, work_time: float, counters: dict, notes: dict) -> None:
+    """
+    Cancel the prefetches not started, and release the files prefetched but not read, so that they are evicted as
+    usual; end-of-operation hook registered with metrics. Eg the pages after an error, or after a cancelled operation.
+    """
+    if not enabled:
+        return
+
+    with _lock:
+        futures = dict(_fetching)
+
+    for future in futures.values():
+        future.cancel()
+
+    wait(futures.values())  # Fetches in progress.
+
+    with _lock:
+        for path_cache, future in futures.items():
+            if future.cancelled():
+                _fetching.pop(path_cache, None)
+
+        _prefetched.clear()
+
+    try:
+        evict()
+    except OSError:  # Eg cache folder not created yet.
+        pass
+
+
+metrics.on_operation_end(report)
+metrics.on_operation_end(release)
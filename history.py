@@ -0,0 +1,358 @@
+"""
+Local run history; each operation of TS Tools is recorded in a SQLite database, at the end of the operation.
+Peak memory is sampled per operation, in a background thread, from the start of the processing to the end.
+Run this file to display throughput trends per title, the slowest chapters, and regressions.
+    TS_HISTORY_DB={path} - location of the database; defaults to ts_history.db alongside this file.
+"""
+
+import atexit
+import os
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+
+import metrics
+from lib import parse_path
+
+db_path = os.environ.get(
+    "TS_HISTORY_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ts_history.db"),
+)
+sample_interval = 0.05  # Seconds between samples of the memory of the process.
+# Flag the latest run if slower than the median of previous runs by this factor.
+regression_ratio = 1.25
+columns = [
+    "run_at",
+    "module",
+    "title",
+    "language",
+    "chapter",
+    "pages",
+    "annotations",
+    "bytes_read",
+    "bytes_written",
+    "renames",
+    "wall_time",
+    "process_peak_memory",
+    "work_peak_memory",
+]
+
+_lock = threading.Lock()
+_pending = []  # Records not yet written; kept for the next flush if writing fails.
+_sampler = None
+
+
+def peak_memory() -> int:
+    """
+    Peak resident memory of the process since it started, in bytes; 0 if not available.
+    Not reset between operations, so later operations in a TS Tools session report the largest earlier peak.
+    """
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB.
+
+    except ImportError:  # Windows
+        counters = memory_counters()
+
+        return counters.PeakWorkingSetSize if counters else 0
+
+
+def memory_counters():
+    """
+    The memory counters of the process on Windows (PROCESS_MEMORY_COUNTERS); None if not available.
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+
+    if ctypes.windll.psapi.GetProcessMemoryInfo(
+        handle, ctypes.byref(counters), counters.cb
+    ):
+        return counters
+
+    return None
+
+
+def current_memory() -> int:
+    """
+    Resident memory (working set) of the process, in bytes; 0 if not available.
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/statm") as file:
+                return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+        if sys.platform == "darwin":
+            import ctypes
+
+            # struct rusage_info_v0; a 16-byte UUID, then 10 uint64, ri_resident_size the 7th.
+            info = (ctypes.c_uint64 * 12)()
+            libproc = ctypes.CDLL("/usr/lib/libproc.dylib")
+
+            if libproc.proc_pid_rusage(os.getpid(), 0, ctypes.byref(info)) == 0:
+                return info[2 + 6]
+
+            return 0
+
+        if os.name == "nt":
+            counters = memory_counters()
+
+            return counters.WorkingSetSize if counters else 0
+
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    return 0
+
+
+class MemorySampler(threading.Thread):
+    """
+    Sample the resident memory of the process until stopped; the peak of an operation, unlike the peak of
+    the process, is not carried over from earlier operations.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_memory()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(sample_interval):
+            self.peak = max(self.peak, current_memory())
+
+    def stop(self) -> int:
+        self.stopped.set()
+        self.join()
+
+        return max(self.peak, current_memory())
+
+
+def start_sampling() -> None:
+    """
+    Start sampling the memory of the operation; start-of-work hook registered with metrics.
+    """
+    global _sampler
+
+    stop_sampling()
+    _sampler = MemorySampler()
+    _sampler.start()
+
+
+def stop_sampling() -> int:
+    """
+    :return: The peak resident memory since start_sampling(), in bytes; 0 if not sampling
+    """
+    global _sampler
+
+    sampler, _sampler = _sampler, None
+
+    return sampler.stop() if sampler else 0
+
+
+def record(name: str, work_time: float, counters: dict, notes: dict) -> None:
+    """
+    Write a record of the operation; end-of-operation hook registered with metrics.
+    The time, and peak memory recorded are from metrics.start_work(), ie without the file dialogs, and prompts.
+    Operations that did not start processing (cancelled, or queries) are not recorded.
+    """
+    work_peak = stop_sampling()
+    path = notes.get("path", "")
+
+    if not path or "work_start" not in notes:
+        return
+
+    title, language, chapter = parse_path(path)
+    row = (
+        time.strftime("%Y-%m-%d %H:%M:%S"),
+        name,
+        title,
+        language,
+        chapter,
+        counters.get("pages", 0),
+        counters.get("annotations", 0),
+        counters.get("bytes_read", 0),
+        counters.get("bytes_written", 0),
+        counters.get("renames", 0),
+        work_time,
+        peak_memory(),
+        work_peak,
+    )
+
+    with _lock:
+        _pending.append(row)
+
+    flush()  # A few operations per session; written now, so that closing the window loses nothing.
+
+
+def connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS runs ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "run_at TEXT, module TEXT, title TEXT, language TEXT, chapter TEXT, "
+        "pages INTEGER, annotations INTEGER, bytes_read INTEGER, bytes_written INTEGER, "
+        "renames INTEGER, wall_time REAL, process_peak_memory INTEGER, work_peak_memory INTEGER)"
+    )
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+
+    # Databases created by earlier versions; peak_memory was always the peak of the process.
+    if "peak_memory" in existing:
+        conn.execute(
+            "ALTER TABLE runs RENAME COLUMN peak_memory TO process_peak_memory"
+        )
+
+    if "work_peak_memory" not in existing:
+        conn.execute("ALTER TABLE runs ADD COLUMN work_peak_memory INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_title ON runs (title, module)")
+
+    return conn
+
+
+def flush() -> None:
+    """
+    Write the pending records to the database in a single transaction; kept for the next flush if writing fails.
+    """
+    with _lock:
+        rows = list(_pending)
+        _pending.clear()
+
+    if not rows:
+        return
+
+    try:
+        with connect() as conn:
+            conn.executemany(
+                f"INSERT INTO runs ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                rows,
+            )
+
+        conn.close()
+
+    except Exception as e:
+        with _lock:
+            _pending[:0] = rows
+
+        print(f"\n<=> [ERROR] Failed to write run history.\n<=>  {e}")
+
+
+def show_history() -> None:
+    """
+    Display throughput per title and module, the slowest chapters, and regressions over time.
+    """
+    flush()
+
+    if not os.path.exists(db_path):
+        print("\n<=> No run history recorded.")
+        return
+
+    conn = connect()
+    rows = conn.execute(
+        "SELECT title, language, chapter, module, pages, bytes_read, wall_time, run_at, "
+        "work_peak_memory FROM runs ORDER BY id"
+    ).fetchall()
+    conn.close()
+
+    if not rows:
+        print("\n<=> No run history recorded.")
+        return
+
+    # Throughput per title and module; seconds per page, and seconds per MB read, of the runs with either.
+    groups = {}
+
+    for row in rows:
+        groups.setdefault((row[0] or "-", row[1] or "-", row[3]), []).append(row)
+
+    col_size = [24, 4, 18, 6, 11, 11]
+
+    def average(values: list) -> str:
+        return f"{statistics.mean(values):.3f}" if values else "-"
+
+    def latest(values: list) -> str:
+        return f"{values[-1]:.3f}" if values else "-"
+
+    print("\n<=> Throughput per Title (processing time, without prompts) :")
+    print(
+        f"<=> | {'Title':<{col_size[0]}} | {'Lang':<{col_size[1]}} | {'Module':<{col_size[2]}} "
+        f"| {'Runs':>{col_size[3]}} | {'s/page avg':>{col_size[4]}} | {'s/page last':>{col_size[5]}} "
+        f"| {'s/MB avg':>{col_size[4]}} | {'s/MB last':>{col_size[5]}} |"
+    )
+
+    regressions = []
+
+    for (title, language, module), runs in sorted(groups.items()):
+        paged = [run for run in runs if run[4]]
+        per_page = [run[6] / run[4] for run in paged]
+        read = [run for run in runs if run[5]]
+        per_mb = [run[6] / (run[5] / 1e6) for run in read]
+
+        print(
+            f"<=> | {title[:col_size[0]]:<{col_size[0]}} | {language:<{col_size[1]}} "
+            f"| {module[:col_size[2]]:<{col_size[2]}} | {len(runs):>{col_size[3]}} "
+            f"| {average(per_page):>{col_size[4]}} | {latest(per_page):>{col_size[5]}} "
+            f"| {average(per_mb):>{col_size[4]}} | {latest(per_mb):>{col_size[5]}} |"
+        )
+
+        # Seconds per page where the module counts pages, otherwise seconds per MB read.
+        times, timed = (per_page, paged) if per_page else (per_mb, read)
+
+        if len(times) > 2:
+            median = statistics.median(times[:-1])
+
+            if median and times[-1] > median * regression_ratio:
+                regressions.append((timed[-1], times[-1] / median))
+
+    print("\n<=> Slowest Chapters (processing time) :")
+    print(
+        f"<=> | {'Title':<{col_size[0]}} | {'Chapter':<7} | {'Module':<{col_size[2]}} "
+        f"| {'Pages':>6} | {'MB':>8} | {'Time (s)':>9} | {'Peak MB':>8} |"
+    )
+
+    for row in sorted(rows, key=lambda x: -x[6])[:10]:
+        print(
+            f"<=> | {(row[0] or '-')[:col_size[0]]:<{col_size[0]}} | {row[2] or '-':<7} "
+            f"| {row[3][:col_size[2]]:<{col_size[2]}} | {row[4]:>6} "
+            f"| {row[5] / 1e6:>8.1f} | {row[6]:>9.2f} "
+            f"| {f'{row[8] / 1e6:.0f}' if row[8] else '-':>8} |"
+        )
+
+    print("\n<=> Regressions (latest run against median of previous runs) :")
+
+    if not regressions:
+        print("<=>  None found.")
+
+    for row, ratio in regressions:
+        print(
+            f"<=>  {row[0] or '-'} {row[2] or ''} ({row[3]}) on {row[7]} : {ratio:.2f}x slower"
+        )
+
+
+metrics.on_work_start(start_sampling)
+metrics.on_operation_end(record)
+atexit.register(flush)
+
+
+if __name__ == "__main__":
+    show_history()
@@ -1,7 +1,13 @@
+import hashlib
 import os
+import re
 import tkinter as tk
 from tkinter import filedialog as fd
 
+import metrics
+
+chunk_size = 8 * 1024 * 1024  # Bytes per read/copy call, when streaming files.
+
 
 def welcome_sequence(items: list):
     max_chars = len(max(items, key=len))
@@ -29,7 +35,7 @@ def hor_bar(num_chars: int, text: str = "") -> None:
     print(display_x)
 
 
-def identify_path(base_type: str) -> str:
+def identify_path(base_type: str, file_type: tuple = ("PDF", "*.pdf")) -> str:
     root = tk.Tk()
     root.withdraw()
     root.attributes("-topmost", True)
@@ -39,13 +45,18 @@ def identify_path(base_type: str) -> str:
     match base_type:
         case "file":
             path = fd.askopenfilename(
-                title="Select PDF File",
-                filetypes=(("PDF files", "*.pdf"), ("All files", "*.*")),
+                title=f"Select {file_type[0]} File",
+                filetypes=(
+                    (f"{file_type[0]} files", file_type[1]),
+                    ("All files", "*.*"),
+                ),
             )
         case "folder":
             path = fd.askdirectory(title="Select Folder")
 
     root.destroy()
+    metrics.note("path", path)
+
     return path
 
 
@@ -93,13 +104,29 @@ def continue_sequence() -> bool:
         return False
 
 
-def display_message(tag: str, message: str, exception: str = "") -> None:
+def display_message(
+    tag: str, message: str, exception: str = "", item: bool = False
+) -> None:
+    """
+    Display a tagged message.
+    :param tag: The tag of the message, eg SUCCESS, ERROR
+    :param message: The message to display
+    :param exception: Optional details, usually of an exception
+    :param item: True for per-file messages; folded into a progress line in quiet mode (errors still displayed)
+    """
+    if item and metrics.quiet:
+        metrics.progress(tag)
+
+        if tag != "ERROR":
+            return
+
     print(f"\n<=> [{tag}] {message}")
 
     if exception:
         print(f"<=>  {exception}")
 
 
+@metrics.traced
 def process_pathname(
     case_num: int, base_path: str, target: str = "", data: list = []
 ) -> str:
@@ -113,7 +140,8 @@ def process_pathname(
     for item in os.listdir(psd_path):
         filename, ext = os.path.splitext(item)
 
-        display_message("PROCESSING", f"{item} ...")
+        display_message("PROCESSING", f"{item} ...", item=True)
+        metrics.count("files")
 
         if ext.lower() == ".psd":  # Process only PSD files
             path0 = os.path.join(psd_path, item)
@@ -121,20 +149,21 @@ def process_pathname(
             if os.path.isfile(path0):
                 match case_num:
                     case 1:  # Initial case when appending page markers ("##X") to original file name.
-                        page_num = filename[-2:]
+                        new_filename = append_page_marker(item)
 
-                        if page_num.isdigit():
-                            new_filename = f"{filename} {page_num}X{ext}"
+                        if new_filename:
                             path1 = os.path.join(psd_path, new_filename)
 
                             if path0 == path1:
                                 display_message(
-                                    "SKIP", "File with the same target name exists."
+                                    "SKIP",
+                                    "File with the same target name exists.",
+                                    item=True,
                                 )
                             else:
                                 rename_path(path0, path1, "file")
                         else:
-                            display_message("SKIP", "Not a valid file path.")
+                            display_message("SKIP", "Not a valid file path.", item=True)
 
                     case 2:  # Case when marking files for revision, with "X"
                         if " " in filename:
@@ -145,13 +174,17 @@ def process_pathname(
                                 path1 = os.path.join(psd_path, new_filename)
 
                                 if path0 == path1:
-                                    display_message("SKIP", "File already marked.")
+                                    display_message(
+                                        "SKIP", "File already marked.", item=True
+                                    )
                                 else:
                                     rename_path(path0, path1, "file")
                             else:
-                                display_message("SKIP", "No revisions required.")
+                                display_message(
+                                    "SKIP", "No revisions required.", item=True
+                                )
                         else:
-                            display_message("SKIP", "No page marker found.")
+                            display_message("SKIP", "No page marker found.", item=True)
 
                     case 3:  # Case when cleaning up files name, prior to submission, remove page markers ("##" or "##X")
                         if " " in filename:
@@ -162,17 +195,17 @@ def process_pathname(
 
                             if path0 == path1:
                                 display_message(
-                                    "SKIP", "File with the same name exists."
+                                    "SKIP", "File with the same name exists.", item=True
                                 )
                             else:
                                 rename_path(path0, path1, "file")
                         else:
-                            display_message("SKIP", "No page marker found.")
+                            display_message("SKIP", "No page marker found.", item=True)
 
             else:
-                display_message("SKIP", "Not a valid file path.")
+                display_message("SKIP", "Not a valid file path.", item=True)
         else:
-            display_message("SKIP", "Not a PSD file.")
+            display_message("SKIP", "Not a PSD file.", item=True)
 
     return psd_path
 
@@ -181,12 +214,159 @@ def rename_path(path_src: str, path_dst, pathtype: str) -> None:
     base_src = os.path.basename(path_src)
     base_dst = os.path.basename(path_dst)
     try:
-        os.rename(path_src, path_dst)
+        with metrics.span("rename_path"):
+            os.rename(path_src, path_dst)
 
+        metrics.count("renames")
         display_message(
             "SUCCESS",
             f"F{pathtype[1:]} renamed.\n<=>  From : {base_src}\n<=>  To   : {base_dst}",
+            item=pathtype == "file",
         )
 
     except Exception as e:
         display_message("ERROR", f"Failed to rename {pathtype}.", f"{e}")
+
+
+def append_page_marker(basename: str) -> str:
+    """
+    Append the page marker ("##X") to the filename of an original PSD file;
+    the last two digits of the filename, ie the page number.
+    :param basename: The filename of the PSD file, with extension
+    :return: The new filename; empty string if the filename does not end with a page number
+    """
+    filename, ext = os.path.splitext(basename)
+    page_num = filename[-2:]
+
+    if not page_num.isdigit():
+        return ""
+
+    return f"{filename} {page_num}X{ext}"
+
+
+def file_hash(filepath: str) -> str:
+    """
+    SHA-256 digest of a file, read in chunks.
+    :param filepath: The path of the file
+    :return: The hexadecimal digest
+    """
+    digest = hashlib.sha256()
+
+    with open(filepath, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+
+    metrics.count("bytes_hashed", os.path.getsize(filepath))
+
+    return digest.hexdigest()
+
+
+def copy_file(path_src: str, path_dst: str, offset: int = 0) -> int:
+    """
+    Copy a file, starting at offset (to resume an interrupted copy), without passing the data through Python;
+    copy_file_range, or sendfile, where supported by the OS; otherwise, a buffered copy.
+    :param path_src: The path of the source file
+    :param path_dst: The path of the destination file; created, or overwritten from offset
+    :param offset: The number of bytes already copied
+    :return: The number of bytes copied
+    """
+    size = os.path.getsize(path_src)
+    copied = 0
+    offset = offset if os.path.exists(path_dst) else 0
+
+    with (
+        open(path_src, "rb") as file_src,
+        open(path_dst, "r+b" if offset else "wb") as file_dst,
+    ):
+        file_dst.truncate(offset)
+        fd_src, fd_dst = file_src.fileno(), file_dst.fileno()
+
+        with metrics.span("copy_file", file=os.path.basename(path_src)):
+            if hasattr(os, "copy_file_range"):
+                try:
+                    while offset + copied < size:
+                        sent = os.copy_file_range(
+                            fd_src,
+                            fd_dst,
+                            min(chunk_size, size - offset - copied),
+                            offset + copied,
+                            offset + copied,
+                        )
+
+                        if not sent:
+                            break
+
+                        copied += sent
+                except (
+                    OSError
+                ):  # Eg across file systems on older kernels; continue below.
+                    pass
+
+            if hasattr(os, "sendfile") and offset + copied < size:
+                try:
+                    file_dst.seek(offset + copied)
+
+                    while offset + copied < size:
+                        sent = os.sendfile(
+                            fd_dst,
+                            fd_src,
+                            offset + copied,
+                            min(chunk_size, size - offset - copied),
+                        )
+
+                        if not sent:
+                            break
+
+                        copied += sent
+                except (
+                    OSError
+                ):  # Eg destination is not a socket (macOS); continue below.
+                    pass
+
+            if offset + copied < size:
+                file_src.seek(offset + copied)
+                file_dst.seek(offset + copied)
+
+                while chunk := file_src.read(chunk_size):
+                    file_dst.write(chunk)
+                    copied += len(chunk)
+
+    metrics.count("bytes_copied", copied)
+
+    return copied
+
+
+def parse_path(path: str) -> tuple:
+    """
+    Identify the title, language, and chapter from a path within the local directory structure,
+    ie PROJECTS/{Title Code}/CH{n}/...; or the title folder itself, by its title code (eg 2025-Q4-KH-B5-34),
+    without a chapter.
+    :param path: The file or folder selected for the operation
+    :return: (title, language, chapter); empty strings if not identified
+    """
+    parts = os.path.normpath(path).split(os.sep)
+
+    for index, part in enumerate(parts):
+        if re.fullmatch(r"CH\s*\d+", part, re.IGNORECASE) and index > 0:
+            title, language = parse_title_folder(parts[index - 1])
+
+            return title, language, part.upper().replace(" ", "")
+
+    for part in reversed(parts):
+        if re.match(r"\d{4}-Q\d-[A-Z]{2}-", part, re.IGNORECASE):
+            return *parse_title_folder(part), ""
+
+    return "", "", ""
+
+
+def parse_title_folder(title_folder: str) -> tuple:
+    """
+    Identify the title, and language from the name of the title folder : {Title Code} {Title Name}
+    :return: (title, language)
+    """
+    title_split = title_folder.split(" ")
+    code_split = title_split[0].split("-")
+    language = code_split[2].lower() if len(code_split) > 2 else ""
+    title = " ".join(title_split[1:]) or title_folder
+
+    return title, language
@@ -0,0 +1,271 @@
+"""
+Lightweight instrumentation of the hot paths : nested timing spans, and counters
+(pages, annotations, bytes read/written, renames, and the like).
+Controlled by environment variables, all disabled by default :
+    TS_TRACE=1 - collect timing spans, and display a summary at the end of each operation;
+    TS_TRACE_FILE={path} - export the spans and counters to a Chrome trace (JSON) file; implies TS_TRACE;
+    TS_QUIET=1 - replace the per-file messages with a single, aggregated progress line.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+trace_file = os.environ.get("TS_TRACE_FILE", "")
+enabled = bool(os.environ.get("TS_TRACE") or trace_file)
+quiet = bool(os.environ.get("TS_QUIET"))
+
+_lock = threading.Lock()
+_null_span = nullcontext()
+_epoch = time.perf_counter()
+_events = []  # Completed spans, as Chrome trace "complete" (ph = X) events.
+_counters = {}
+_progress = {"items": 0, "skipped": 0, "errors": 0}
+_notes = {}  # Details of the current operation, eg the path selected.
+# Called at the end of each operation, with (name, work_time, counters, notes).
+_hooks = []
+_work_hooks = []  # Called by start_work(), without arguments.
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        event = {
+            "name": self.name,
+            "ph": "X",
+            # Timestamps and durations in microseconds, as expected by the trace viewer.
+            "ts": (self.start - _epoch) * 1e6,
+            "dur": (end - self.start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+
+        if self.args:
+            event["args"] = self.args
+
+        with _lock:
+            _events.append(event)
+
+        return False
+
+
+def span(name: str, **args):
+    """
+    Time the enclosed block; spans nest by virtue of their timestamps.
+    Returns a shared no-op context manager when tracing is disabled.
+    :param name: The name of the span, eg "decode_psd"
+    :param args: Optional details shown with the span in the trace viewer
+    :return: A context manager
+    """
+    if not enabled:
+        return _null_span
+
+    return _Span(name, args)
+
+
+def traced(func):
+    """
+    Decorator; time each call of the function as a span named after it.
+    The function is returned unwrapped when tracing is disabled.
+    """
+    if not enabled:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _Span(func.__name__, {}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def count(name: str, value: int = 1) -> None:
+    """
+    Increment a counter. Counters are always collected; these are cheap, and used by the run history.
+    :param name: The name of the counter, eg "pages"
+    :param value: The increment
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def counters() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def note(key: str, value) -> None:
+    """
+    Record a detail of the current operation, eg the selected path; passed on to the end-of-operation hooks.
+    """
+    with _lock:
+        _notes[key] = value
+
+
+def start_work() -> None:
+    """
+    Mark the start of the processing in the current operation, once the file dialogs, and prompts are answered;
+    the time passed on to the end-of-operation hooks is measured from here.
+    """
+    note("work_start", time.perf_counter())
+
+    for hook in _work_hooks:
+        try:
+            hook()
+        except Exception as e:
+            print(f"\n<=> [ERROR] Failed to run start-of-work hook.\n<=>  {e}")
+
+
+def progress(tag: str) -> None:
+    """
+    Fold a per-file message into the aggregated progress line (quiet mode).
+    Called from worker threads too; the line is printed under the lock, so that lines do not interleave.
+    :param tag: The tag of the message; PROCESSING, SKIP, or ERROR
+    """
+    key = {"PROCESSING": "items", "SKIP": "skipped", "ERROR": "errors"}.get(tag)
+
+    if not key:
+        return
+
+    with _lock:
+        _progress[key] += 1
+        print(
+            f"\r<=> [PROGRESS] {_progress['items']} processed, {_progress['skipped']} skipped,"
+            f" {_progress['errors']} errors ...",
+            end="",
+            flush=True,
+        )
+
+
+def on_operation_end(func) -> None:
+    """
+    Register a function called at the end of each operation, with (name, work_time, counters, notes);
+    work_time is measured from start_work(), or from the start of the operation if not called.
+    """
+    _hooks.append(func)
+
+
+def on_work_start(func) -> None:
+    """
+    Register a function called by start_work(), ie when the processing of an operation starts.
+    """
+    _work_hooks.append(func)
+
+
+def reset() -> None:
+    with _lock:
+        _events.clear()
+        _counters.clear()
+        _notes.clear()
+
+        for key in _progress:
+            _progress[key] = 0
+
+
+@contextmanager
+def operation(name: str):
+    """
+    Wrap a complete operation, eg a menu option; resets the spans and counters,
+    then reports, and exports them at the end.
+    :param name: The name of the operation, usually the name of the function run
+    """
+    reset()
+    start = time.perf_counter()
+
+    try:
+        with span(name):
+            yield
+    finally:
+        end = time.perf_counter()
+        wall_time = end - start
+        work_time = end - _notes.get("work_start", start)
+
+        if quiet and any(_progress.values()):
+            print("")  # Terminate the progress line.
+
+        if enabled:
+            report(wall_time)
+
+        if trace_file:
+            export(trace_file)
+
+        for hook in _hooks:
+            try:
+                hook(name, work_time, counters(), dict(_notes))
+            except Exception as e:
+                print(f"\n<=> [ERROR] Failed to run end-of-operation hook.\n<=>  {e}")
+
+
+def report(wall_time: float) -> None:
+    """
+    Display the total time, and number of calls per span name, and the counters.
+    """
+    with _lock:
+        events = list(_events)
+        counts = dict(_counters)
+
+    totals = {}
+
+    for event in events:
+        calls, dur = totals.get(event["name"], (0, 0.0))
+        totals[event["name"]] = (calls + 1, dur + event["dur"] / 1e6)
+
+    col_size = [24, 8, 10]
+
+    print(f"\n<=> Trace Summary ({wall_time:.3f} s) :")
+    print(
+        f"<=> | {'Span':<{col_size[0]}} | {'Calls':>{col_size[1]}} | {'Total (s)':>{col_size[2]}} |"
+    )
+
+    for name, (calls, dur) in sorted(totals.items(), key=lambda x: -x[1][1]):
+        print(
+            f"<=> | {name[:col_size[0]]:<{col_size[0]}} | {calls:>{col_size[1]}} | {dur:>{col_size[2]}.3f} |"
+        )
+
+    for name, value in sorted(counts.items()):
+        print(f"<=>  {name} : {value:,}")
+
+
+def export(filepath: str) -> None:
+    """
+    Write the spans, and counters to a JSON file in the Chrome trace event format;
+    open with chrome://tracing, or https://ui.perfetto.dev.
+    :param filepath: The path of the JSON file
+    """
+    with _lock:
+        events = list(_events)
+        counts = dict(_counters)
+
+    if counts:
+        events.append(
+            {
+                "name": "counters",
+                "ph": "C",
+                "ts": (time.perf_counter() - _epoch) * 1e6,
+                "pid": os.getpid(),
+                "args": counts,
+            }
+        )
+
+    try:
+        with open(filepath, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+        print(f"\n<=> [SUCCESS] Trace exported to {os.path.basename(filepath)}.")
+
+    except Exception as e:
+        print(f"\n<=> [ERROR] Failed to export trace.\n<=>  {e}")
@@ -5,6 +5,7 @@ Saves each comment in a CSV file with the following parameters :
     {x0, y0} - top-left corner of the comment, normalised with respect to the dimensions of the PDF page
     {w, h} - width and height of the comment box, normalised with respect to the dimensions of the PDF page
     {text} - text of the comment
+    {sfx_suggestions} - localisations of SFX comments in the title language, from the translation memory (mod_08)
 """
 
 import csv
@@ -12,13 +13,17 @@ import os
 
 import fitz
 
+import metrics
+from cache import local_path
 from lib import (
     continue_sequence,
     display_message,
     display_path_desc,
     identify_path,
+    parse_path,
     welcome_sequence,
 )
+from mod_08 import sfx_suggestions
 
 # Module variables
 mod_name = "PDF Comments Scraper"
@@ -47,7 +52,8 @@ def get_translations() -> None:
     input_path = os.path.normpath(path)  # Normalise path.
     dirname, filename = display_path_desc(input_path, "file")
 
-    header = ["page_num", "x0", "y0", "w_box", "h_box", "text"]
+    header = ["page_num", "x0", "y0", "w_box", "h_box", "text", "sfx_suggestions"]
+    lang = parse_path(input_path)[1]  # ISO language code, from the title code.
     data_rows = []
 
     # User input for right-to-left reading order
@@ -68,9 +74,13 @@ def get_translations() -> None:
             rtl = False
 
     print(f"\n<=> RTL sort order will{' ' if rtl else ' not '}be applied.")
+    metrics.start_work()
 
     try:
-        doc = fitz.open(input_path)
+        with metrics.span("open_pdf"):
+            doc = fitz.open(local_path(input_path))
+
+        metrics.count("bytes_read", os.path.getsize(input_path))
         col_size = [6, 10]
 
         print("\n<=> Summary of Retrieved Comments :")
@@ -93,7 +103,12 @@ def get_translations() -> None:
             page_rect = page.rect  # From PDF page
             page_width, page_height = page_rect.width, page_rect.height
             types = [0, 2]  # PDF_ANNOT_TEXT, PDF_ANNOT_FREE_TEXT
-            annots = list(page.annots(types=types))
+
+            with metrics.span("read_annots", page=page_num):
+                annots = list(page.annots(types=types))
+
+            metrics.count("pages")
+            metrics.count("annotations", len(annots))
 
             def norm_dim(dim, dim1):
                 return (dim[0] / dim1[0], dim[1] / dim1[1])
@@ -122,6 +137,7 @@ def get_translations() -> None:
                         f"{w_norm:g}",
                         f"{h_norm:g}",
                         comment,
+                        sfx_suggestions(comment, lang),
                     ]
                 )
 
@@ -177,6 +193,7 @@ def sort_rtl(page_data: list, rtl: bool) -> list:
     return list(map(lambda x: [x[0], f"{x[1]:g}", f"{x[2]:g}"] + x[4:], sorted_data))
 
 
+@metrics.traced
 def write_to_csv(directory: str, data: list) -> None:
     """
     Transfer the data to a CSV file named "translations.csv" (csv_name),
@@ -190,6 +207,8 @@ def write_to_csv(directory: str, data: list) -> None:
         with open(csv_path, "w", newline="", encoding="utf-8") as file:
             csv.writer(file).writerows(data)
 
+        metrics.count("bytes_written", os.path.getsize(csv_path))
+
         display_message("SUCCESS", f"{len(data) - 1} comments written to {csv_name}.")
 
         display_path_desc(csv_path, "file")
@@ -198,6 +217,7 @@ def write_to_csv(directory: str, data: list) -> None:
         display_message("ERROR", f"Error writing to CSV file {csv_name}.", f"{e}")
 
 
+@metrics.traced
 def fetch_img_props(page: fitz.Page) -> dict:
     img_list = page.get_images(full=True)
 
@@ -240,5 +260,7 @@ if __name__ == "__main__":
     confirm_exit = False
 
     while not confirm_exit:
-        get_translations()
+        with metrics.operation(get_translations.__name__):
+            get_translations()
+
         confirm_exit = continue_sequence()
@@ -130,11 +130,11 @@ function parse_csv(csv_str) {
 
     // Truncate header row.
     for (var i=1; i<lines.length; i++) {
-        var lines_split = lines[i].split(',');
+        var lines_split = split_csv_line(lines[i]);
 
         if (lines_split.length<6) continue; // Stop processing the line, possibly malformed.
 
-        var text = lines_split.slice(5).join(',');
+        var text = lines_split[5];  // Columns after the text, eg sfx_suggestions, are not transferred.
         var replacement_arr = [
             ['""', '"'],
             ['<>', '\r'],
@@ -179,6 +179,36 @@ function parse_csv(csv_str) {
 }
 
 
+/**
+ * Split a line of the CSV file into fields, ignoring commas within quoted fields.
+ * Fields are returned as is, with enclosing and doubled quotation marks.
+ * @param {string} line A line of the CSV file
+ * @returns {Array} fields The fields of the line
+ */
+function split_csv_line(line) {
+    var fields = [];
+    var field = '';
+    var in_quotes = false;
+
+    for (var i=0; i<line.length; i++) {
+        var chr = line.charAt(i);
+
+        if (chr === '"') in_quotes = !in_quotes;  // Doubled quotation marks toggle twice.
+
+        if (chr === ',' && !in_quotes) {
+            fields.push(field);
+            field = '';
+        } else {
+            field += chr;
+        }
+    }
+
+    fields.push(field);
+
+    return fields;
+}
+
+
 /**
  * Change the ruler units to PIXELS, if not set already.
  * @param {Enumerator} curr_units The current unit that is set.
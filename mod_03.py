@@ -8,6 +8,8 @@ import os
 
 import fitz
 
+import metrics
+from cache import local_path
 from lib import (
     continue_sequence,
     display_message,
@@ -41,9 +43,13 @@ def process_rev_file() -> None:
 
     input_path = os.path.normpath(path)  # Normalise path.
     dirname, filename = display_path_desc(input_path, "file")
+    metrics.start_work()
 
     try:
-        doc = fitz.open(input_path)
+        with metrics.span("open_pdf"):
+            doc = fitz.open(local_path(input_path))
+
+        metrics.count("bytes_read", os.path.getsize(input_path))
         col_size = [6, 10]
 
         print("\n<=> Summary :")
@@ -55,7 +61,11 @@ def process_rev_file() -> None:
             page_num = page_index + 1
 
             # Select all pages with at least one annotation (usually of type [0-TEXT, 2-FREE_TEXT, 13-STAMP).
-            annots = list(page.annots())
+            with metrics.span("read_annots", page=page_num):
+                annots = list(page.annots())
+
+            metrics.count("pages")
+            metrics.count("annotations", len(annots))
 
             if len(annots) > 0:
                 pages_marked.append(f"{page_num:02}")
@@ -101,5 +111,7 @@ if __name__ == "__main__":
     confirm_exit = False
 
     while not confirm_exit:
-        process_rev_file()
+        with metrics.operation(process_rev_file.__name__):
+            process_rev_file()
+
         confirm_exit = continue_sequence()
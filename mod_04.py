@@ -4,6 +4,7 @@ Rename files in a folder, either by appending page markers (##X), or removing it
 
 import os
 
+import metrics
 from lib import (
     continue_sequence,
     display_message,
@@ -64,6 +65,7 @@ def rename_files() -> None:
     print(
         f"\n<=> Page markers to be {'appended to' if method == 'A' else 'removed from'} PSD files."
     )
+    metrics.start_work()
 
     try:
         process_pathname(method_case[method], input_path)
@@ -84,5 +86,7 @@ if __name__ == "__main__":
     confirm_exit = False
 
     while not confirm_exit:
-        rename_files()
+        with metrics.operation(rename_files.__name__):
+            rename_files()
+
         confirm_exit = continue_sequence()
@@ -7,6 +7,8 @@ import os
 
 from PIL import Image
 
+import metrics
+from cache import local_path, prefetch
 from lib import (
     continue_sequence,
     display_message,
@@ -21,6 +23,9 @@ mod_ver = "1"
 date = "19 Dec 2025"
 email = "tlcpineda.projects@gmail.com"
 psd_folder = "2 TYPESETTING"
+prefetch_ahead = (
+    3  # Number of pages fetched to the local cache ahead of the current page.
+)
 lang_dict = {
     "kh": "Khmer",
     "hi": "Hindi",
@@ -43,6 +48,7 @@ def compile_to_pdf():
 
     input_path = os.path.normpath(path)  # Normalise path.
     display_path_desc(input_path, "folder")
+    metrics.start_work()
 
     # Get and sort PSD files from folder; only files that follow filename pattern.
     files = filter_files(input_path)
@@ -60,26 +66,31 @@ def compile_to_pdf():
     # Slice [1:]; first image is handled by the save() call, as anchor
     img_stream = image_generator(input_path, files[1:])
     first_path = os.path.join(input_path, files[0])
+    prefetch([os.path.join(input_path, f) for f in files[1 : 1 + prefetch_ahead]])
 
     output_filepath = gen_out_filepath(input_path)
 
     try:
-        with Image.open(first_path) as first_img:
-            base_img = first_img.convert("RGB")
+        with Image.open(local_path(first_path)) as first_img:
+            base_img = convert_image(first_img, first_path)
 
             # The "save" function pulls from the generator one by one
             display_message(
                 "PROCESSING",
                 f"Creating anchor file : {files[0]} ...",
+                item=True,
             )
 
-            base_img.save(
-                output_filepath,
-                "PDF",
-                resolution=72.0,
-                save_all=True,
-                append_images=img_stream,
-            )
+            with metrics.span("write_pdf"):
+                base_img.save(
+                    output_filepath,
+                    "PDF",
+                    resolution=72.0,
+                    save_all=True,
+                    append_images=img_stream,
+                )
+
+        metrics.count("bytes_written", os.path.getsize(output_filepath))
 
         display_message("SUCCESS", f"{len(files)} PSD files compiled as PDF.")
         display_path_desc(output_filepath, "file")
@@ -130,20 +141,51 @@ def image_generator(folder: str, files: list):
     :param files:
     :return:
     """
-    for filename in files:
+    for index, filename in enumerate(files):
         filepath = os.path.join(folder, filename)
+        # Fetch the next pages to the local cache, if enabled, while this one is converted.
+        prefetch(
+            [
+                os.path.join(folder, f)
+                for f in files[index + 1 : index + 1 + prefetch_ahead]
+            ]
+        )
 
         try:
-            with Image.open(filepath) as img:
+            with Image.open(local_path(filepath)) as img:
                 display_message(
                     "PROCESSING",
                     f"Adding file : {filename} ...",
+                    item=True,
                 )
 
-                yield img.convert("RGB")
+                rgb_img = convert_image(img, filepath)
+
+            yield rgb_img
 
         except Exception as e:
-            display_message("ERROR", f"Error processing file : {filename}", f"{e}")
+            display_message(
+                "ERROR", f"Error processing file : {filename}", f"{e}", item=True
+            )
+
+
+def convert_image(img: Image.Image, filepath: str) -> Image.Image:
+    """
+    Decode the image data, and convert to RGB; timed separately when tracing.
+    :param img: The opened (not yet decoded) PSD image
+    :param filepath: The path of the PSD file
+    :return: The RGB image
+    """
+    with metrics.span("decode_psd", file=os.path.basename(filepath)):
+        img.load()
+
+    with metrics.span("convert_rgb"):
+        rgb_img = img.convert("RGB")
+
+    metrics.count("pages")
+    metrics.count("bytes_read", os.path.getsize(filepath))
+
+    return rgb_img
 
 
 def gen_out_filepath(folder_path: str) -> str:
@@ -177,5 +219,7 @@ if __name__ == "__main__":
     confirm_exit = False
 
     while not confirm_exit:
-        compile_to_pdf()
+        with metrics.operation(compile_to_pdf.__name__):
+            compile_to_pdf()
+
         confirm_exit = continue_sequence()
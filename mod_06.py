@@ -0,0 +1,274 @@
+"""
+Fetch clean working PSD files from the repository folder (local copy of the shared Drive folder),
+and create the chapter folders under the title folder :
+    {Title Code}/CH{n}/2 TYPESETTING/{TitleName}_{vol}_{chap}_{page} {pg}X.psd
+The chapter is identified from the filename of each PSD file; page markers (##X) are appended while copying.
+Files already fetched (same size and hash) are skipped; interrupted copies (*.part files) are resumed.
+Existing files that differ from the source (eg already being typeset) are never overwritten; reported as conflicts.
+Where the file system supports reflinks, working files are kept once in the content-addressed store (see store.py),
+and cloned to each language chapter; otherwise, copied to each chapter.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+from lib import (
+    append_page_marker,
+    continue_sequence,
+    copy_file,
+    display_message,
+    display_path_desc,
+    file_hash,
+    identify_path,
+    welcome_sequence,
+)
+from store import (
+    ingest,
+    link,
+    matches,
+    save_index,
+    show_report,
+    source_digest,
+    store_path,
+    supports_reflink,
+)
+
+# Module variables
+mod_name = "Prepare Folders"
+mod_ver = "1"
+date = "19 Oct 2026"
+email = "tlcpineda.projects@gmail.com"
+psd_folder = "2 TYPESETTING"
+max_workers = 4  # Number of files copied concurrently.
+# Clone files from the content-addressed store, instead of copying to each chapter folder; where supported.
+use_store = True
+
+
+def prepare_folders() -> None:
+    """
+    Copy the working PSD files from the repository to their chapter folders.
+    """
+    print(">>> Select repository folder of clean working files ...")
+
+    path = identify_path("folder")
+
+    if not path:
+        print("\n<=> No folder selected.")
+        return
+
+    src_path = os.path.normpath(path)  # Normalise path.
+    display_path_desc(src_path, "folder")
+
+    print("\n>>> Select title folder ...")
+
+    path = identify_path("folder")
+
+    if not path:
+        print("\n<=> No folder selected.")
+        return
+
+    title_path = os.path.normpath(path)
+    display_path_desc(title_path, "folder")
+    metrics.start_work()
+
+    jobs = list_jobs(src_path, title_path)
+
+    if not jobs:
+        display_message("ERROR", "No PSD files fit to be fetched.")
+        return
+
+    chapters = sorted({os.path.dirname(os.path.dirname(dst)) for _, dst in jobs})
+
+    for chapter in chapters:
+        os.makedirs(os.path.join(chapter, psd_folder), exist_ok=True)
+
+    print(
+        f"\n<=> {len(jobs)} PSD files to fetch for {len(chapters)} chapter{'s' if len(chapters) > 1 else ''} :"
+    )
+
+    for chapter in chapters:
+        print(f"<=>  {os.path.basename(chapter)}")
+
+    store = store_path(title_path) if use_store else ""
+
+    if store and not supports_reflink(store):
+        print(
+            "\n<=> Reflinks not supported by the file system; files copied to each chapter."
+        )
+        store = ""
+
+    start = time.perf_counter()
+    copied_bytes = 0
+    results = {
+        "COPIED": 0,
+        "RESUMED": 0,
+        "LINKED": 0,
+        "SKIP": 0,
+        "CONFLICT": 0,
+        "ERROR": 0,
+    }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_file, src, dst, store): dst for src, dst in jobs
+        }
+
+        for future in as_completed(futures):
+            basename = os.path.basename(futures[future])
+            display_message("PROCESSING", f"{basename} ...", item=True)
+
+            try:
+                status, size = future.result()
+                copied_bytes += size
+                results[status] += 1
+
+                if status == "SKIP":
+                    display_message("SKIP", "File already fetched.", item=True)
+                elif status == "CONFLICT":
+                    display_message(
+                        "ERROR",
+                        "File differs from the source; not overwritten.",
+                        item=True,
+                    )
+                else:
+                    display_message("SUCCESS", f"File {status.lower()}.", item=True)
+
+            except Exception as e:
+                results["ERROR"] += 1
+                display_message(
+                    "ERROR", f"Failed to fetch {basename}.", f"{e}", item=True
+                )
+
+    elapsed = time.perf_counter() - start
+    rate = copied_bytes / 1e6 / elapsed if elapsed else 0
+    fetched = results["COPIED"] + results["RESUMED"] + results["LINKED"]
+
+    display_message(
+        "SUCCESS",
+        f"{fetched} files fetched ({results['RESUMED']} resumed, {results['LINKED']} linked from store), "
+        f"{results['SKIP']} skipped, {results['CONFLICT']} conflicts, {results['ERROR']} failed."
+        f"\n<=>  {copied_bytes / 1e6:,.1f} MB in {elapsed:.1f} s ({rate:,.1f} MB/s)",
+    )
+
+    if store:
+        save_index(store)
+        show_report(os.path.dirname(title_path))
+
+
+def list_jobs(src_path: str, title_path: str) -> list:
+    """
+    List the PSD files in the repository folder (including subfolders), with their destination paths.
+    :param src_path: The repository folder
+    :param title_path: The title folder where the chapter folders are created
+    :return: A list of (source path, destination path)
+    """
+    jobs = []
+
+    for dirpath, _, filenames in os.walk(src_path):
+        for item in sorted(filenames):
+            chapter = get_chapter(item)
+            new_filename = append_page_marker(item)
+
+            if not chapter or not new_filename:
+                display_message("SKIP", f"{item} : not a working PSD file.", item=True)
+                continue
+
+            jobs.append(
+                (
+                    os.path.join(dirpath, item),
+                    os.path.join(title_path, chapter, psd_folder, new_filename),
+                )
+            )
+
+    return jobs
+
+
+def get_chapter(filename: str) -> str:
+    """
+    Identify the chapter folder from the filename : {TitleName}_{vol}_{chap}_{page}.psd
+    :param filename: The filename of the PSD file
+    :return: The chapter folder name, eg "CH3"; empty string if filename does not follow the pattern
+    """
+    basename, ext = os.path.splitext(filename)
+    parts = basename.split("_")
+
+    if ext.lower() != ".psd" or len(parts) < 4 or not parts[-2].isdigit():
+        return ""
+
+    return f"CH{int(parts[-2])}"
+
+
+def fetch_file(path_src: str, path_dst: str, store: str = "") -> tuple:
+    """
+    Copy a file, unless it already exists; resume a partial copy (*.part).
+    An existing file with the same size and hash is skipped; one that differs, eg a file already being typeset
+    under the same name, is a conflict, and left as it is.
+    :param path_src: The path of the source file
+    :param path_dst: The path of the destination file
+    :param store: The path of the content-addressed store; copy directly to destination if empty
+    :return: (status, number of bytes copied); status is one of COPIED, RESUMED, LINKED, SKIP, or CONFLICT
+    """
+    size = os.path.getsize(path_src)
+    metrics.count("pages")
+
+    if store:
+        # Checked before the store; an existing file is neither copied to the store, nor replaced.
+        if os.path.exists(path_dst):
+            if os.path.getsize(path_dst) != size:
+                return "CONFLICT", 0
+
+            same = matches(store, path_dst, source_digest(store, path_src))
+
+            return ("SKIP" if same else "CONFLICT"), 0
+
+        digest, copied, resumed = ingest(store, path_src)
+        mode = link(store, digest, path_dst)
+
+        if mode == "copy":  # Eg the clone failed for this file; a private copy.
+            copied += size
+
+        metrics.count("bytes_written", copied)
+
+        if mode == "reflink" and not copied:
+            return "LINKED", 0
+
+        return ("RESUMED" if resumed else "COPIED"), copied
+
+    if os.path.exists(path_dst):
+        if os.path.getsize(path_dst) != size:
+            return "CONFLICT", 0
+
+        same = file_hash(path_dst) == file_hash(path_src)
+
+        return ("SKIP" if same else "CONFLICT"), 0
+
+    path_part = f"{path_dst}.part"
+    offset = os.path.getsize(path_part) if os.path.exists(path_part) else 0
+    offset = offset if offset <= size else 0
+    copied = copy_file(path_src, path_part, offset)
+
+    # Verify resumed copies; the partial file may be from an older version of the source.
+    if offset and file_hash(path_part) != file_hash(path_src):
+        copied += copy_file(path_src, path_part)
+        offset = 0
+
+    os.replace(path_part, path_dst)
+    metrics.count("bytes_written", copied)
+
+    return ("RESUMED" if offset else "COPIED"), copied
+
+
+if __name__ == "__main__":
+    welcome_sequence([mod_name, f"ver {mod_ver} {date}", email])
+
+    print(input("\n>>> Press enter to continue ..."))
+
+    confirm_exit = False
+
+    while not confirm_exit:
+        with metrics.operation(prepare_folders.__name__):
+            prepare_folders()
+
+        confirm_exit = continue_sequence()
@@ -0,0 +1,497 @@
+"""
+Package the typeset PSD files in "6 FINAL PSD" for submission, after page markers are removed (mod_04) :
+    [Z]ip - a ZIP file, with members compressed in parallel; or,
+    [M]irror - a copy of the folder, with files copied in parallel.
+Every PSD file must follow the final filename pattern {TitleName}_{vol[3]}_{chap[4]}_{page[3]}.psd;
+a checksum manifest (SHA256SUMS.txt) is included in the bundle. Files are streamed in chunks, not held in memory.
+Existing bundles in the destination folder are not overwritten; a new bundle is prefixed "COPY".
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import struct
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from lib import (
+    chunk_size,
+    continue_sequence,
+    copy_file,
+    display_message,
+    display_path_desc,
+    file_hash,
+    identify_path,
+    welcome_sequence,
+)
+
+# Module variables
+mod_name = "Submission Packager"
+mod_ver = "1"
+date = "19 Oct 2026"
+email = "tlcpineda.projects@gmail.com"
+folder_name = "6 FINAL PSD"
+manifest_name = "SHA256SUMS.txt"
+filename_pattern = re.compile(r"^([A-Za-z0-9]+_\d{3}_\d{4})_\d{3}\.psd$", re.IGNORECASE)
+max_workers = 4  # Number of files compressed, or copied, concurrently.
+compress_level = 6  # zlib compression level; 1 (fastest) to 9 (smallest).
+# Sizes, and offsets, from this value are recorded in ZIP64 extra fields.
+zip64_limit = 0xFFFFFFFF
+
+
+def package_submission() -> None:
+    """
+    Validate the filenames of the typeset PSD files, and package them for submission.
+    """
+    print(f'>>> Select PSD folder ("{folder_name}") ...')
+
+    path = identify_path("folder")
+
+    if not path:
+        print("\n<=> No folder selected.")
+        return
+
+    input_path = os.path.normpath(path)  # Normalise path.
+    display_path_desc(input_path, "folder")
+
+    files, invalid = validate_files(input_path)
+
+    if invalid:
+        display_message(
+            "ERROR",
+            f"{len(invalid)} PSD files do not follow the final filename pattern.",
+            "\n<=>  ".join(invalid),
+        )
+        return
+
+    if not files:
+        display_message("ERROR", "No PSD files fit to be packaged.")
+        return
+
+    bundles = {filename_pattern.match(f).group(1) for f in files}
+
+    if len(bundles) > 1:
+        display_message(
+            "ERROR", "PSD files from more than one chapter.", ", ".join(sorted(bundles))
+        )
+        return
+
+    bundle_name = bundles.pop()
+
+    print("\n>>> Select an option to package files ...")
+
+    method = None
+
+    while method is None:
+        print(">>>  [Z]ip file, compressed.")
+        print(">>>  [M]irror folder.")
+        method = input(">>> ").upper()
+
+        if method not in ["Z", "M"]:
+            method = None
+            print("<=> Select from the options : [Z, M]\n")
+
+    print("\n>>> Select destination folder ...")
+
+    path = identify_path("folder")
+
+    if not path:
+        print("\n<=> No folder selected.")
+        return
+
+    dest_path = os.path.normpath(path)
+    metrics.note("path", input_path)  # The chapter packaged, not the destination.
+    metrics.start_work()
+    start = time.perf_counter()
+    output_path = new_path(
+        dest_path, f"{bundle_name}.zip" if method == "Z" else bundle_name
+    )
+
+    try:
+        if method == "Z":
+            write_zip(input_path, files, output_path)
+        else:
+            mirror_folder(input_path, files, output_path)
+
+        elapsed = time.perf_counter() - start
+        total = sum(os.path.getsize(os.path.join(input_path, f)) for f in files)
+
+        display_message(
+            "SUCCESS",
+            f"{len(files)} PSD files packaged, with {manifest_name}."
+            f"\n<=>  {total / 1e6:,.1f} MB in {elapsed:.1f} s ({total / 1e6 / elapsed:,.1f} MB/s)",
+        )
+        display_path_desc(output_path, "file" if method == "Z" else "folder")
+
+    except Exception as e:
+        display_message("ERROR", "Failed to package files.", f"{e}")
+
+
+def validate_files(folder: str) -> tuple:
+    """
+    Check the filenames of the PSD files against the final filename pattern.
+    :param folder: The folder of the typeset PSD files
+    :return: (sorted list of valid PSD files, list of invalid PSD files)
+    """
+    files, invalid = [], []
+
+    for f in sorted(os.listdir(folder)):
+        if os.path.splitext(f)[1].lower() != ".psd":
+            continue
+
+        if filename_pattern.match(f):
+            files.append(f)
+        else:
+            invalid.append(f)
+
+    return files, invalid
+
+
+def new_path(dest_path: str, name: str) -> str:
+    """
+    A path in the destination folder not already taken; prefixed "COPY", then "COPY 2", and so on.
+    """
+    output_path = os.path.join(dest_path, name)
+    copy = 1
+
+    while os.path.exists(output_path):
+        output_path = os.path.join(
+            dest_path, f"COPY {name}" if copy == 1 else f"COPY {copy} {name}"
+        )
+        copy += 1
+
+    return output_path
+
+
+def manifest_text(checksums: list) -> str:
+    """
+    The checksums in the format of sha256sum; verify with "sha256sum -c SHA256SUMS.txt".
+    :param checksums: A list of (filename, digest)
+    :return: The contents of the manifest
+    """
+    return "".join(f"{digest}  {filename}\n" for filename, digest in checksums)
+
+
+def mirror_folder(folder: str, files: list, output_path: str) -> None:
+    """
+    Copy the PSD files to a new destination folder, in parallel; with the manifest of the source files.
+    Files are copied to {output_path}.part, renamed once every copy is verified against the digest of its source,
+    and the manifest written; so that no partial bundle is left under the bundle name.
+    """
+    path_part = f"{output_path}.part"
+
+    if os.path.exists(path_part):  # Left by an interrupted run.
+        shutil.rmtree(path_part)
+
+    os.makedirs(path_part)
+
+    try:
+        mirror_files(folder, files, path_part)
+    except BaseException:
+        shutil.rmtree(path_part, ignore_errors=True)
+        raise
+
+    os.replace(path_part, output_path)
+
+
+def mirror_files(folder: str, files: list, path_part: str) -> None:
+    """
+    Copy, and verify the PSD files, and write the manifest.
+    """
+
+    def mirror_file(filename: str) -> str:
+        path_src = os.path.join(folder, filename)
+        path_dst = os.path.join(path_part, filename)
+        digest = file_hash(path_src)
+        copy_file(path_src, path_dst)
+
+        if file_hash(path_dst) != digest:
+            raise OSError(f"Copy of {filename} does not match its source.")
+
+        metrics.count("pages")
+        metrics.count("bytes_written", os.path.getsize(path_src))
+        display_message("SUCCESS", f"{filename} copied.", item=True)
+
+        return digest
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        digests = list(executor.map(mirror_file, files))
+
+    with open(
+        os.path.join(path_part, manifest_name), "w", encoding="utf-8", newline="\n"
+    ) as file:
+        file.write(manifest_text(list(zip(files, digests))))
+
+
+def compress_member(filepath: str) -> dict:
+    """
+    Compress a file (raw deflate) to a temporary file, computing the CRC-32, and SHA-256 in the same pass.
+    Files that do not compress are stored instead; copied from the source when written to the ZIP file.
+    :param filepath: The path of the file
+    :return: The details of the ZIP member
+    """
+    crc, size, comp_size = 0, 0, 0
+    digest = hashlib.sha256()
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+    temp = tempfile.TemporaryFile()
+
+    with metrics.span("compress_member", file=os.path.basename(filepath)):
+        with open(filepath, "rb") as file:
+            while chunk := file.read(chunk_size):
+                crc = zlib.crc32(chunk, crc)
+                digest.update(chunk)
+                size += len(chunk)
+                comp_size += temp.write(compressor.compress(chunk))
+
+        comp_size += temp.write(compressor.flush())
+
+    metrics.count("bytes_read", size)
+
+    if comp_size >= size:  # Already compressed, eg RLE image data.
+        temp.close()
+        temp, comp_size = None, size
+
+    return {
+        "path": filepath,
+        "name": os.path.basename(filepath),
+        "crc": crc,
+        "size": size,
+        "comp_size": comp_size,
+        "method": 8 if temp else 0,  # Deflate, or stored.
+        "temp": temp,
+        "mtime": os.path.getmtime(filepath),
+        "digest": digest.hexdigest(),
+    }
+
+
+def field32(value: int) -> int:
+    """
+    The value of a 32-bit field; 0xFFFFFFFF where the value is recorded in the ZIP64 extra field.
+    """
+    return 0xFFFFFFFF if value >= zip64_limit else value
+
+
+def dos_datetime(timestamp: float) -> tuple:
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = (max(t.tm_year - 1980, 0) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+    return dos_time, dos_date
+
+
+def write_member(out, member: dict) -> dict:
+    """
+    Write the local header, and data of a compressed member to the ZIP file.
+    :param out: The ZIP file, open for writing
+    :param member: The details of the member, from compress_member()
+    :return: The member, with its offset
+    """
+    member["offset"] = out.tell()
+    name = member["name"].encode("utf-8")
+    zip64 = member["size"] >= zip64_limit or member["comp_size"] >= zip64_limit
+    extra = (
+        struct.pack("<HHQQ", 0x0001, 16, member["size"], member["comp_size"])
+        if zip64
+        else b""
+    )
+    dos_time, dos_date = dos_datetime(member["mtime"])
+
+    out.write(
+        struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            45 if zip64 else 20,
+            0x0800,  # Filenames in UTF-8.
+            member["method"],
+            dos_time,
+            dos_date,
+            member["crc"],
+            0xFFFFFFFF if zip64 else member["comp_size"],
+            0xFFFFFFFF if zip64 else member["size"],
+            len(name),
+            len(extra),
+        )
+    )
+    out.write(name + extra)
+
+    if member["temp"]:
+        source = member["temp"]
+        source.seek(0)
+    else:
+        source = open(member["path"], "rb")
+
+    with source:
+        while chunk := source.read(chunk_size):
+            out.write(chunk)
+
+    return member
+
+
+def write_central_directory(out, members: list) -> None:
+    """
+    Write the central directory, and the end records (ZIP64, where needed) of the ZIP file.
+    """
+    cd_offset = out.tell()
+
+    for member in members:
+        name = member["name"].encode("utf-8")
+        fields = [
+            value
+            for value in [member["size"], member["comp_size"], member["offset"]]
+            if value >= zip64_limit
+        ]
+        extra = (
+            struct.pack(f"<HH{len(fields)}Q", 0x0001, 8 * len(fields), *fields)
+            if fields
+            else b""
+        )
+        dos_time, dos_date = dos_datetime(member["mtime"])
+
+        out.write(
+            struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                45,
+                45 if fields else 20,
+                0x0800,
+                member["method"],
+                dos_time,
+                dos_date,
+                member["crc"],
+                field32(member["comp_size"]),
+                field32(member["size"]),
+                len(name),
+                len(extra),
+                0,  # Comment length, disk number, internal attributes.
+                0,
+                0,
+                0o100644 << 16,  # External attributes; regular file, rw-r--r--.
+                field32(member["offset"]),
+            )
+        )
+        out.write(name + extra)
+
+    cd_end = out.tell()
+    cd_size = cd_end - cd_offset
+    count = len(members)
+
+    if count >= 0xFFFF or cd_size >= zip64_limit or cd_offset >= zip64_limit:
+        out.write(
+            struct.pack(
+                "<IQHHIIQQQQ",
+                0x06064B50,
+                44,
+                45,
+                45,
+                0,
+                0,
+                count,
+                count,
+                cd_size,
+                cd_offset,
+            )
+        )
+        out.write(struct.pack("<IIQI", 0x07064B50, 0, cd_end, 1))
+
+    out.write(
+        struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(count, 0xFFFF),
+            min(count, 0xFFFF),
+            field32(cd_size),
+            field32(cd_offset),
+            0,
+        )
+    )
+
+
+@metrics.traced
+def write_zip(folder: str, files: list, output_path: str) -> None:
+    """
+    Write the PSD files to a ZIP file; members are compressed in parallel, then written in order.
+    At most twice the number of workers are compressed ahead of the writer, bounding temporary disk space.
+    :param folder: The folder of the typeset PSD files
+    :param files: The filenames of the PSD files
+    :param output_path: The path of the ZIP file
+    """
+    # No partial ZIP file is left behind on failure, or interruption.
+    try:
+        write_members(folder, files, f"{output_path}.part")
+    except BaseException:
+        if os.path.exists(f"{output_path}.part"):
+            os.remove(f"{output_path}.part")
+
+        raise
+
+    os.replace(f"{output_path}.part", output_path)
+    metrics.count("bytes_written", os.path.getsize(output_path))
+
+
+def write_members(folder: str, files: list, path_part: str) -> None:
+    """
+    Write the members, the manifest, and the central directory of the ZIP file.
+    """
+    members = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, open(
+        path_part, "wb"
+    ) as out:
+        paths = [os.path.join(folder, f) for f in files]
+        pending = [
+            executor.submit(compress_member, p) for p in paths[: 2 * max_workers]
+        ]
+        queued = len(pending)
+
+        while pending:
+            member = pending.pop(0).result()
+
+            if queued < len(paths):
+                pending.append(executor.submit(compress_member, paths[queued]))
+                queued += 1
+
+            members.append(write_member(out, member))
+            metrics.count("pages")
+            display_message("SUCCESS", f"{member['name']} added.", item=True)
+
+        # Manifest, as the last member.
+        manifest = manifest_text([(m["name"], m["digest"]) for m in members]).encode()
+        temp = tempfile.TemporaryFile()
+        temp.write(manifest)
+        members.append(
+            write_member(
+                out,
+                {
+                    "path": "",
+                    "name": manifest_name,
+                    "crc": zlib.crc32(manifest),
+                    "size": len(manifest),
+                    "comp_size": len(manifest),
+                    "method": 0,
+                    "temp": temp,
+                    "mtime": time.time(),
+                },
+            )
+        )
+
+        write_central_directory(out, members)
+
+
+if __name__ == "__main__":
+    welcome_sequence([mod_name, f"ver {mod_ver} {date}", email])
+
+    print(input("\n>>> Press enter to continue ..."))
+
+    confirm_exit = False
+
+    while not confirm_exit:
+        with metrics.operation(package_submission.__name__):
+            package_submission()
+
+        confirm_exit = continue_sequence()
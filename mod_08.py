@@ -0,0 +1,486 @@
+"""
+Translate JP : a translation memory of Japanese text (often SFX), and matching localisations per language.
+Entries are kept in a SQLite database, and indexed in memory when first used :
+    exact, and prefix - a trie of the normalised keys; and,
+    fuzzy - a bigram index of the normalised keys, candidates ranked by (bounded) edit distance; short keys,
+    which share few or no bigrams with a match (eg "pa", "don"), are looked up in a deletion index instead
+    (each key of up to short_key + max_distance characters, with up to max_distance characters deleted).
+Keys are normalised to romaji, so that katakana, hiragana, and romaji spellings of the same sound match.
+Glossaries are imported from CSV files, either :
+    jp,lang,text - one localisation per row; or,
+    jp,{lang1},{lang2},... - one column per language code, eg jp,kh,hi.
+    TS_TM_DB={path} - location of the database; defaults to tm.db alongside this file.
+"""
+
+import csv
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import metrics
+from lib import (
+    continue_sequence,
+    display_message,
+    display_path_desc,
+    identify_path,
+    welcome_sequence,
+)
+
+# Module variables
+mod_name = "Translate JP"
+mod_ver = "1"
+date = "19 Oct 2026"
+email = "tlcpineda.projects@gmail.com"
+db_path = os.environ.get(
+    "TS_TM_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tm.db")
+)
+max_distance = 2  # Maximum edit distance of fuzzy matches, in romaji characters.
+max_suggestions = 3
+short_key = 6  # Keys up to this length are looked up in the deletion index; the bigram filter is too loose.
+key_version = 1  # Version of normalise(); stored keys are recomputed when it changes.
+
+# Hepburn romaji of hiragana; katakana are mapped to hiragana before lookup.
+kana_romaji = dict(
+    zip(
+        "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめも"
+        "やゆよらりるれろわゐゑをんがぎぐげござじずぜぞだぢづでどばびぶべぼぱぴぷぺぽゔぁぃぅぇぉゃゅょゎ",
+        "a i u e o ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no "
+        "ha hi fu he ho ma mi mu me mo ya yu yo ra ri ru re ro wa i e o n "
+        "ga gi gu ge go za ji zu ze zo da ji zu de do ba bi bu be bo pa pi pu pe po vu "
+        "a i u e o ya yu yo wa".split(),
+    )
+)
+small_y = {"ゃ": "a", "ゅ": "u", "ょ": "o"}  # Contracted sounds, eg き + ゃ = kya.
+# Kana, kanji, and half-width katakana.
+japanese_chars = re.compile(r"[\u3040-\u30ff\u31f0-\u31ff\u4e00-\u9fff\uff66-\uff9f]+")
+# Comments of kana only, eg "ドキドキ！"; with marks of emphasis, and spaces.
+kana_only = re.compile(r"[\s\u3040-\u30ff\uff66-\uff9f!?！？。、…~〜]+")
+sfx_prefix = re.compile(r"^\s*sfx\s*[:\-]?\s*([^=(:<\-]+)", re.IGNORECASE)
+
+_lock = threading.Lock()
+_index = {}  # Loaded when first used; see load_index().
+
+
+def normalise(text: str) -> str:
+    """
+    Normalise Japanese text, or romaji, to a lookup key; lowercase romaji, without spaces, or punctuation.
+    Kanji are kept as they are. Eg ドキドキ, and どきどき to dokidoki; ヒュー to hyuu; ジャーン to jaan.
+    :param text: The text to normalise
+    :return: The key
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    chars = []
+
+    for char in text:
+        if "ァ" <= char <= "ヶ":  # Katakana to hiragana.
+            char = chr(ord(char) - 0x60)
+
+        chars.append(char)
+
+    key = ""
+    double_next = False
+
+    for char in chars:
+        if char in small_y and key and key[-1] == "i" and len(key) > 1:
+            # Contracted sounds; shi + ゃ = sha, chi + ゃ = cha, ji + ゃ = ja; ki + ゃ = kya, hi + ゃ = hya
+            key = key[:-1] if key.endswith(("shi", "chi", "ji")) else key[:-1] + "y"
+            key += small_y[char]
+        elif char == "っ":
+            double_next = True
+            continue
+        elif char == "ー":  # Long vowel mark; repeat the previous vowel.
+            key += key[-1] if key and key[-1] in "aeiou" else ""
+        elif char in kana_romaji:
+            romaji = kana_romaji[char]
+            key += (
+                romaji[0] if double_next and romaji[0] not in "aeiou" else ""
+            ) + romaji
+        elif char.isalnum():
+            key += char
+
+        double_next = False
+
+    return key
+
+
+def connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS entries ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, jp TEXT, key TEXT, lang TEXT, text TEXT, "
+        "UNIQUE (jp, lang, text))"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_key ON entries (key, lang)")
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] < key_version:
+        with conn:
+            conn.executemany(
+                "UPDATE entries SET key = ? WHERE id = ?",
+                [
+                    (normalise(jp), row_id)
+                    for row_id, jp in conn.execute("SELECT id, jp FROM entries")
+                ],
+            )
+            conn.execute(f"PRAGMA user_version = {key_version}")
+
+    return conn
+
+
+def load_index() -> dict:
+    """
+    Build the in-memory index from the database, once.
+    :return: The index; entries by key, trie of keys, keys by bigram, and short keys by deletion variant
+    """
+    with _lock:
+        if _index:
+            return _index
+
+        with metrics.span("load_tm_index"):
+            entries, trie, grams, deletes = {}, {}, {}, {}
+
+            if os.path.exists(db_path):
+                conn = connect()
+                rows = conn.execute(
+                    "SELECT jp, key, lang, text FROM entries"
+                ).fetchall()
+                conn.close()
+            else:
+                rows = []
+
+            for jp, key, lang, text in rows:
+                entries.setdefault(key, []).append((jp, lang, text))
+
+            for key in entries:
+                node = trie
+
+                for char in key:
+                    node = node.setdefault(char, {})
+
+                node["$"] = key  # Terminal; the complete key.
+
+                for gram in bigrams(key):
+                    grams.setdefault(gram, set()).add(key)
+
+                # Keys that may match a short query, ie one without enough bigrams to filter on.
+                if len(key) <= short_key + max_distance:
+                    for variant, depth in deletions(key, max_distance).items():
+                        deletes.setdefault(variant, {})[key] = depth
+
+            _index.update(
+                {"entries": entries, "trie": trie, "grams": grams, "deletes": deletes}
+            )
+
+        return _index
+
+
+def bigrams(key: str) -> set:
+    padded = f"^{key}$"
+
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+def deletions(key: str, limit: int) -> dict:
+    """
+    The key, with up to limit characters deleted; two keys within edit distance limit share a variant.
+    :return: The number of characters deleted, by variant
+    """
+    variants = {key: 0}
+    level = {key}
+
+    for depth in range(1, limit + 1):
+        level = {v[:i] + v[i + 1 :] for v in level for i in range(len(v))}
+
+        for variant in level:
+            variants.setdefault(variant, depth)
+
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance, abandoned once it exceeds the limit.
+    :return: The distance; limit + 1 if exceeded
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    # Only cells within limit of the diagonal can be on a path within the limit; the others stay above it.
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+
+    for i, char_a in enumerate(a, 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = min(i, over)
+        best = current[low - 1]
+
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost < over else over
+
+            if cost < best:
+                best = cost
+
+        if best > limit:
+            return over
+
+        previous = current
+
+    return previous[-1]
+
+
+def find_exact(key: str) -> list:
+    return [key] if key in load_index()["entries"] else []
+
+
+def find_prefix(key: str, limit: int = 10) -> list:
+    """
+    Keys starting with the given key, by walking the trie.
+    """
+    node = load_index()["trie"]
+
+    for char in key:
+        node = node.get(char)
+
+        if node is None:
+            return []
+
+    found, stack = [], [node]
+
+    while stack and len(found) < limit:
+        node = stack.pop()
+
+        for char, child in node.items():
+            if char == "$":
+                found.append(child)
+            else:
+                stack.append(child)
+
+    return found[:limit]
+
+
+def find_fuzzy(key: str, limit: int = max_distance) -> list:
+    """
+    Keys within the edit distance limit; candidates share enough bigrams, as each edit changes at most two.
+    Short keys, with too few bigrams to filter on, are looked up in the deletion index.
+    :param limit: The maximum edit distance; not more than max_distance
+    :return: A list of keys, nearest first
+    """
+    index = load_index()
+
+    if len(key) > short_key:
+        query = bigrams(key)
+        minimum = len(query) - 2 * limit
+        shared = {}
+
+        for gram in query:
+            for candidate in index["grams"].get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        candidates = [c for c, count in shared.items() if count >= minimum]
+    else:  # Keys within the limit share a variant, each with at most limit characters deleted.
+        deletes = index["deletes"]
+        candidates = {
+            candidate
+            for variant in deletions(key, limit)
+            for candidate, depth in deletes.get(variant, {}).items()
+            if depth <= limit
+        }
+
+    scored = []
+
+    for candidate in candidates:
+        distance = edit_distance(key, candidate, limit)
+
+        if distance <= limit:
+            scored.append((distance, candidate))
+
+    return [candidate for _, candidate in sorted(scored)]
+
+
+def suggest(text: str, lang: str) -> list:
+    """
+    Localisations for the Japanese text (or romaji), in the target language; exact matches only, if any;
+    otherwise fuzzy matches, then keys starting with the text.
+    :param text: The Japanese text, or romaji
+    :param lang: The ISO language code of the localisation, eg "kh"
+    :return: A list of (Japanese text, localisation)
+    """
+    key = normalise(text)
+
+    if not key:
+        return []
+
+    entries = load_index()["entries"]
+    suggestions = []
+
+    # Each search only if the previous ones found too few; most SFX are exact matches.
+    # Any two keys of two characters are within an edit distance of two; short keys allow fewer edits.
+    limit = min(max_distance, max(len(key) // 2, 1))
+    searches = (find_exact, lambda k: find_fuzzy(k, limit), find_prefix)
+
+    for search in searches:
+        for found in search(key):
+            for jp, entry_lang, localisation in entries[found]:
+                if entry_lang == lang and (jp, localisation) not in suggestions:
+                    suggestions.append((jp, localisation))
+
+            if len(suggestions) >= max_suggestions:
+                return suggestions[:max_suggestions]
+
+        if suggestions and search is searches[0]:
+            return suggestions
+
+    return suggestions
+
+
+def sfx_query(comment: str) -> str:
+    """
+    Identify the Japanese text of an SFX comment. A comment is taken as an SFX if it starts with an "SFX" prefix,
+    eg "SFX: ドキドキ = thump", or "SFX: doki doki - thump"; or if it is only kana, eg "ドキドキ！".
+    Other comments with Japanese text, eg dialogue quoted with its translation, are not looked up.
+    :param comment: The cleaned up comment
+    :return: The Japanese text, or romaji; empty string if the comment is not an SFX
+    """
+    match = sfx_prefix.match(comment)
+
+    if match:
+        kana = japanese_chars.findall(match.group(1))
+
+        return "".join(kana) if kana else match.group(1).strip()
+
+    if kana_only.fullmatch(comment):
+        return "".join(japanese_chars.findall(comment))
+
+    return ""
+
+
+def sfx_suggestions(comment: str, lang: str) -> str:
+    """
+    Suggested localisations of an SFX comment, for the CSV file of mod_01.
+    :return: The localisations separated by " | "; empty string if none
+    """
+    query = sfx_query(comment) if lang else ""
+
+    if not query:
+        return ""
+
+    metrics.count("sfx_lookups")
+
+    return " | ".join(localisation for _, localisation in suggest(query, lang))
+
+
+def import_glossary(filepath: str) -> int:
+    """
+    Import a glossary in CSV format to the database; duplicate entries are ignored.
+    :param filepath: The path of the CSV file
+    :return: The number of entries added
+    """
+    with open(filepath, newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        header = [column.strip().lower() for column in next(reader)]
+        rows = []
+
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+
+            jp = row[0].strip()
+
+            if header[:3] == ["jp", "lang", "text"]:
+                pairs = [(row[1].strip().lower(), row[2].strip())]
+            else:
+                pairs = list(zip(header[1:], [value.strip() for value in row[1:]]))
+
+            rows += [(jp, normalise(jp), lang, text) for lang, text in pairs if text]
+
+    conn = connect()
+
+    with conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO entries (jp, key, lang, text) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        added = conn.total_changes - before
+
+    conn.close()
+
+    with _lock:
+        _index.clear()  # Rebuilt on the next lookup.
+
+    return added
+
+
+def translate_jp() -> None:
+    """
+    Import a glossary, or look up localisations of Japanese text.
+    """
+    print(">>> Select an option ...")
+
+    method = None
+
+    while method is None:
+        print(">>>  [I]mport glossary (CSV file).")
+        print(">>>  [L]ook up Japanese text, or romaji.")
+        method = input(">>> ").upper()
+
+        if method not in ["I", "L"]:
+            method = None
+            print("<=> Select from the options : [I, L]\n")
+
+    if method == "I":
+        print("\n>>> Select a CSV file to import ...")
+
+        path = identify_path("file", ("CSV", "*.csv"))
+
+        if not path:
+            print("\n<=> No file selected.")
+            return
+
+        input_path = os.path.normpath(path)  # Normalise path.
+        display_path_desc(input_path, "file")
+        metrics.start_work()
+
+        try:
+            added = import_glossary(input_path)
+            display_message("SUCCESS", f"{added} entries added to the database.")
+
+        except Exception as e:
+            display_message("ERROR", "Failed to import glossary.", f"{e}")
+
+        return
+
+    print("\n>>> Enter the language code (eg kh, hi) ...")
+    lang = input(">>> ").strip().lower()
+
+    print("\n>>> Enter Japanese text, or romaji; Enter to stop ...")
+
+    while text := input(">>> ").strip():
+        suggestions = suggest(text, lang)
+
+        if not suggestions:
+            print(f"<=> No match for {normalise(text) or text}.")
+
+        for jp, localisation in suggestions:
+            print(f"<=>  {jp} : {localisation}")
+
+
+if __name__ == "__main__":
+    welcome_sequence([mod_name, f"ver {mod_ver} {date}", email])
+
+    print(input("\n>>> Press enter to continue ..."))
+
+    confirm_exit = False
+
+    while not confirm_exit:
+        with metrics.operation(translate_jp.__name__):
+            translate_jp()
+
+        confirm_exit = continue_sequence()
@@ -0,0 +1,252 @@
+"""
+Pre-flight check of the translations in the CSV file, before transfer to the PSD files (mod_02).
+Lays out the text of each row in the text box (textbox_dim_dst of mod_01) with the chapter's Main font;
+greedy line breaking at spaces, and at the line markers ("<>") from clean_up().
+Flags rows that overflow the box, or with words too long for a line, and suggests the largest size that fits.
+Glyph advances are measured once per font, at a reference size, and scaled; no shaping, so widths of
+complex scripts (eg Khmer, Hindi) are approximate.
+"""
+
+import csv
+import os
+import time
+from functools import lru_cache
+
+from PIL import ImageFont
+
+import metrics
+from lib import (
+    continue_sequence,
+    display_message,
+    display_path_desc,
+    identify_path,
+    welcome_sequence,
+)
+from mod_01 import textbox_dim_dst
+
+# Module variables
+mod_name = "Text Fit Check"
+mod_ver = "1"
+date = "19 Oct 2026"
+email = "tlcpineda.projects@gmail.com"
+font_size = 10.0  # Default font size in points.
+min_font_size = 6.0  # Smallest font size suggested.
+size_step = 0.5  # Suggested font sizes are multiples of this step.
+leading = 1.2  # Line height as a ratio of the font size; Photoshop auto leading.
+ref_size = 1000  # Font size at which glyph advances are measured.
+
+_advances = {}  # Glyph advances at ref_size, by font path, then character.
+
+
+@lru_cache(maxsize=8)
+def load_font(font_path: str) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_path, ref_size)
+
+
+def text_width(text: str, font_path: str, size: float) -> float:
+    """
+    Width of the text in points, from the cached glyph advances; kerning is ignored.
+    :param text: The text, within a single line
+    :param font_path: The path of the font file
+    :param size: The font size in points
+    :return: The width in points
+    """
+    advances = _advances.setdefault(font_path, {})
+    width = 0.0
+
+    for char in text:
+        advance = advances.get(char)
+
+        if advance is None:
+            advance = advances[char] = load_font(font_path).getlength(char)
+
+        width += advance
+
+    return width * size / ref_size
+
+
+def layout(text: str, font_path: str, size: float, box_width: float) -> tuple:
+    """
+    Break the text into lines, greedily, within the width of the box.
+    :param text: The text of the row; "<>" marks a line break
+    :param font_path: The path of the font file
+    :param size: The font size in points
+    :param box_width: The width of the box in points
+    :return: (lines, True if a word is wider than the box)
+    """
+    space = text_width(" ", font_path, size)
+    lines, too_long = [], False
+
+    for paragraph in text.split("<>"):
+        line, line_width = "", 0.0
+
+        for word in paragraph.split():
+            word_width = text_width(word, font_path, size)
+            too_long = too_long or word_width > box_width
+
+            if line and line_width + space + word_width <= box_width:
+                line, line_width = f"{line} {word}", line_width + space + word_width
+            else:
+                if line:
+                    lines.append(line)
+
+                line, line_width = word, word_width
+
+        lines.append(line)
+
+    return lines, too_long
+
+
+def fits(text: str, font_path: str, size: float) -> tuple:
+    """
+    Check the text against the text box.
+    :return: (True if the text fits, the number of lines, True if a word is wider than the box)
+    """
+    box_width, box_height = textbox_dim_dst
+    lines, too_long = layout(text, font_path, size, box_width)
+    height = len(lines) * size * leading
+
+    return (not too_long and height <= box_height), len(lines), too_long
+
+
+def suggest_size(text: str, font_path: str, size: float) -> float:
+    """
+    The largest font size, not larger than size, at which the text fits; 0 if none down to min_font_size.
+    """
+    # Number of steps down from size; the text fits at high, if at all.
+    low, high = 0, max(int((size - min_font_size) / size_step), 0)
+
+    if not fits(text, font_path, size - high * size_step)[0]:
+        return 0
+
+    while low < high:
+        mid = (low + high) // 2
+
+        if fits(text, font_path, size - mid * size_step)[0]:
+            high = mid
+        else:
+            low = mid + 1
+
+    return size - low * size_step
+
+
+@metrics.traced
+def check_rows(rows: list, font_path: str, size: float) -> list:
+    """
+    Check each row of the CSV file.
+    :param rows: The rows of the CSV file, as dictionaries
+    :param font_path: The path of the font file
+    :param size: The font size in points
+    :return: A list of (row number, page marker, lines, issue, suggested size) of rows that do not fit
+    """
+    flagged = []
+
+    for row_num, row in enumerate(rows, 1):
+        text = row["text"]
+        fit, num_lines, too_long = fits(text, font_path, size)
+        metrics.count("rows")
+
+        if fit:
+            continue
+
+        issue = "long word" if too_long else "overflow"
+        flagged.append(
+            (
+                row_num,
+                row["page_num"],
+                num_lines,
+                issue,
+                suggest_size(text, font_path, size),
+            )
+        )
+
+    return flagged
+
+
+def check_text_fit() -> None:
+    """
+    Check that the translations in the CSV file fit their text boxes.
+    """
+    print(">>> Select a CSV file of translations ...")
+
+    path = identify_path("file", ("CSV", "*.csv"))
+
+    if not path:
+        print("\n<=> No file selected.")
+        return
+
+    input_path = os.path.normpath(path)  # Normalise path.
+    display_path_desc(input_path, "file")
+
+    print("\n>>> Select the Main font file of the chapter ...")
+
+    path = identify_path("file", ("Font", "*.ttf *.otf *.ttc"))
+
+    if not path:
+        print("\n<=> No file selected.")
+        return
+
+    font_path = os.path.normpath(path)
+    display_path_desc(font_path, "file")
+
+    size = None
+
+    while size is None:
+        print(f"\n>>> Enter font size in points; Enter for {font_size:g} pt.")
+        user_in = input(">>> ").strip()
+
+        try:
+            size = float(user_in) if user_in else font_size
+        except ValueError:
+            print("<=> Enter a number.")
+
+    metrics.note("path", input_path)  # The chapter's CSV file, not the font file.
+    metrics.start_work()
+
+    try:
+        with open(input_path, newline="", encoding="utf-8") as file:
+            rows = list(csv.DictReader(file))
+
+        start = time.perf_counter()
+        flagged = check_rows(rows, font_path, size)
+        elapsed = time.perf_counter() - start
+
+    except Exception as e:
+        display_message("ERROR", "Failed to check text fit.", f"{e}")
+        return
+
+    col_size = [5, 6, 6, 10, 10]
+
+    print(
+        f"\n<=> Rows not fitting {textbox_dim_dst[0]:g} x {textbox_dim_dst[1]:g} pt box :"
+    )
+    print(
+        f"<=> | {'Row':>{col_size[0]}} | {'Page':>{col_size[1]}} | {'Lines':>{col_size[2]}} "
+        f"| {'Issue':<{col_size[3]}} | {'Suggested':>{col_size[4]}} |"
+    )
+
+    for row_num, page, num_lines, issue, suggested in flagged:
+        suggested = f"{suggested:g} pt" if suggested else "-"
+        print(
+            f"<=> | {row_num:>{col_size[0]}} | {page:>{col_size[1]}} | {num_lines:>{col_size[2]}} "
+            f"| {issue:<{col_size[3]}} | {suggested:>{col_size[4]}} |"
+        )
+
+    display_message(
+        "SUCCESS",
+        f"{len(rows)} rows checked in {elapsed * 1000:.0f} ms; {len(flagged)} flagged.",
+    )
+
+
+if __name__ == "__main__":
+    welcome_sequence([mod_name, f"ver {mod_ver} {date}", email])
+
+    print(input("\n>>> Press enter to continue ..."))
+
+    confirm_exit = False
+
+    while not confirm_exit:
+        with metrics.operation(check_text_fit.__name__):
+            check_text_fit()
+
+        confirm_exit = continue_sequence()
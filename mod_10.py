@@ -0,0 +1,327 @@
+"""
+QA of the typeset PSD files before submission, without opening them in Photoshop.
+Reads only the structure of each PSD file (header, and layer records), through a memory map; pixel data is skipped.
+For each file, checks that :
+    there is a text layer for every row of the CSV file (translations.csv) for the page;
+    there are no hidden layers; and,
+    dimensions, and colour mode are the same as most files in the folder.
+"""
+
+import csv
+import mmap
+import os
+import struct
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from lib import (
+    continue_sequence,
+    display_message,
+    display_path_desc,
+    identify_path,
+    welcome_sequence,
+)
+from mod_01 import csv_name
+from mod_05 import get_pg_num
+
+# Module variables
+mod_name = "PSD Layer QA"
+mod_ver = "1"
+date = "19 Oct 2026"
+email = "tlcpineda.projects@gmail.com"
+max_workers = 8  # Number of files read concurrently.
+colour_modes = {
+    0: "Bitmap",
+    1: "Grayscale",
+    2: "Indexed",
+    3: "RGB",
+    4: "CMYK",
+    7: "Multichannel",
+    8: "Duotone",
+    9: "Lab",
+}
+# Keys of additional layer information with 8-byte lengths in PSB files.
+psb_long_keys = {
+    b"LMsk",
+    b"Lr16",
+    b"Lr32",
+    b"Layr",
+    b"Mt16",
+    b"Mt32",
+    b"Mtrn",
+    b"Alph",
+    b"FMsk",
+    b"lnk2",
+    b"FEid",
+    b"FXid",
+    b"PxSD",
+}
+
+
+def read_psd(filepath: str) -> dict:
+    """
+    Read the header, and layer records of a PSD (or PSB) file.
+    :param filepath: The path of the PSD file
+    :return: The width, height, colour mode, and layers (name, type, visibility, bounds) of the file
+    """
+    with (
+        open(filepath, "rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+    ):
+        # Signature, version, reserved (6 bytes), channels, height, width, depth, and colour mode.
+        signature, version, _, height, width, depth, mode = struct.unpack_from(
+            ">4sH6xHIIHH", data, 0
+        )
+
+        if signature != b"8BPS" or version not in (1, 2):
+            raise ValueError("Not a PSD file.")
+
+        psb = version == 2
+        pos = 26
+        pos += 4 + struct.unpack_from(">I", data, pos)[0]  # Colour mode data.
+        pos += 4 + struct.unpack_from(">I", data, pos)[0]  # Image resources.
+        section_len, pos = read_length(data, pos, psb)
+        section_end = pos + section_len
+        layers = []
+
+        if section_len:
+            layer_info_len, layer_pos = read_length(data, pos, psb)
+
+            if layer_info_len:
+                layers = read_layer_records(data, layer_pos, psb)
+
+            # 16 and 32-bit files keep layers in additional information (Lr16, Lr32), after the global mask.
+            pos = layer_pos + layer_info_len
+            pos += 4 + struct.unpack_from(">I", data, pos)[0]
+
+            while not layers and pos + 12 <= section_end:
+                key = data[pos + 4 : pos + 8]
+                block_len, block_pos = read_length(
+                    data, pos + 8, psb and key in psb_long_keys
+                )
+
+                if key in (b"Lr16", b"Lr32"):
+                    layers = read_layer_records(data, block_pos, psb)
+
+                pos = block_pos + block_len + (block_len % 2)
+
+    return {
+        "width": width,
+        "height": height,
+        "depth": depth,
+        "mode": colour_modes.get(mode, str(mode)),
+        "layers": [layer for layer in layers if layer["type"] != "divider"],
+    }
+
+
+def read_length(data, pos: int, long: bool) -> tuple:
+    """
+    Read a length field; 8 bytes in PSB files for some sections, otherwise 4 bytes.
+    :return: (length, position after the field)
+    """
+    if long:
+        return struct.unpack_from(">Q", data, pos)[0], pos + 8
+
+    return struct.unpack_from(">I", data, pos)[0], pos + 4
+
+
+def read_layer_records(data, pos: int, psb: bool) -> list:
+    """
+    Read the layer records, at the start of the layer info; the channel image data that follows is skipped.
+    :param data: The contents of the file
+    :param pos: The position of the layer count
+    :param psb: True for PSB files
+    :return: A list of layers, from the bottom
+    """
+    # Negative if the first alpha channel contains the transparency of the merged result.
+    count = abs(struct.unpack_from(">h", data, pos)[0])
+    pos += 2
+    layers = []
+
+    for _ in range(count):
+        top, left, bottom, right, channels = struct.unpack_from(">iiiiH", data, pos)
+        pos += 18 + channels * (10 if psb else 6)
+        # Blend mode signature, and key, opacity, clipping, flags, filler, and length of extra data.
+        flags = data[pos + 10]
+        extra_len = struct.unpack_from(">I", data, pos + 12)[0]
+        pos += 16
+        extra_end = pos + extra_len
+        pos += 4 + struct.unpack_from(">I", data, pos)[0]  # Layer mask data.
+        pos += 4 + struct.unpack_from(">I", data, pos)[0]  # Blending ranges.
+        name_len = data[pos]
+        name = data[pos + 1 : pos + 1 + name_len].decode("mac_roman")
+        pos += (1 + name_len + 3) // 4 * 4  # Pascal string, padded to 4 bytes.
+        layer_type = "pixel"
+
+        while pos + 12 <= extra_end:
+            signature, key = data[pos : pos + 4], data[pos + 4 : pos + 8]
+
+            if signature not in (b"8BIM", b"8B64"):
+                break
+
+            block_len, block_pos = read_length(
+                data, pos + 8, psb and key in psb_long_keys
+            )
+
+            match key:
+                case b"luni":  # Unicode name.
+                    chars = struct.unpack_from(">I", data, block_pos)[0]
+                    name = data[block_pos + 4 : block_pos + 4 + 2 * chars].decode(
+                        "utf-16-be"
+                    )
+                case b"TySh":  # Type tool object; text layer.
+                    layer_type = "text"
+                case b"lsct" | b"lsdk":  # Section divider; group, or end of group.
+                    section = struct.unpack_from(">I", data, block_pos)[0]
+                    layer_type = {1: "group", 2: "group", 3: "divider"}.get(
+                        section, layer_type
+                    )
+
+            pos = block_pos + block_len
+
+        pos = extra_end
+        layers.append(
+            {
+                "name": name.rstrip("\x00"),
+                "type": layer_type,
+                "visible": not flags & 0x02,
+                "bounds": (left, top, right, bottom),
+            }
+        )
+
+    return layers
+
+
+def read_csv_rows(filepath: str) -> Counter:
+    """
+    Count the rows of the CSV file per page.
+    :param filepath: The path of the CSV file
+    :return: The number of rows, by page number
+    """
+    rows = Counter()
+
+    if not os.path.exists(filepath):
+        return rows
+
+    with open(filepath, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            page = row["page_num"].upper().rstrip("X")
+
+            if page.isdigit():
+                rows[int(page)] += 1
+
+    return rows
+
+
+def inspect_psd_folder() -> None:
+    """
+    Check the layers of the PSD files in the folder against the CSV file, and each other.
+    """
+    print(">>> Select PSD folder ...")
+
+    path = identify_path("folder")
+
+    if not path:
+        print("\n<=> No folder selected.")
+        return
+
+    input_path = os.path.normpath(path)  # Normalise path.
+    display_path_desc(input_path, "folder")
+    metrics.start_work()
+
+    files = sorted(f for f in os.listdir(input_path) if f.lower().endswith(".psd"))
+
+    if not files:
+        display_message("ERROR", "No PSD files found.")
+        return
+
+    csv_path = os.path.join(os.path.dirname(input_path), csv_name)
+    csv_rows = read_csv_rows(csv_path)
+
+    if not csv_rows:
+        display_message(
+            "ERROR", f"No rows found in {csv_name}; text layers not checked."
+        )
+
+    start = time.perf_counter()
+
+    def inspect(filename: str) -> dict:
+        try:
+            with metrics.span("read_psd", file=filename):
+                return read_psd(os.path.join(input_path, filename))
+        except Exception as e:
+            return {"error": f"{e}"}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(inspect, files))
+
+    elapsed = time.perf_counter() - start
+    valid = [result for result in results if "error" not in result]
+    common_size = Counter((r["width"], r["height"]) for r in valid).most_common(1)
+    common_mode = Counter(r["mode"] for r in valid).most_common(1)
+    col_size = [4, 24, 11, 9, 5, 5, 6]
+    issues = 0
+
+    print("\n<=> QA Summary :")
+    print(
+        f"<=> | {'Page':>{col_size[0]}} | {'File':<{col_size[1]}} | {'Size':>{col_size[2]}} "
+        f"| {'Mode':<{col_size[3]}} | {'Text':>{col_size[4]}} | {'Rows':>{col_size[5]}} "
+        f"| {'Hidden':>{col_size[6]}} | Status"
+    )
+
+    for filename, result in zip(files, results):
+        page = get_pg_num(filename)
+        metrics.count("pages")
+
+        if "error" in result:
+            issues += 1
+            print(
+                f"<=> | {page:>{col_size[0]}} | {filename[:col_size[1]]:<{col_size[1]}} | {result['error']}"
+            )
+            continue
+
+        text_layers = sum(layer["type"] == "text" for layer in result["layers"])
+        hidden = [layer["name"] for layer in result["layers"] if not layer["visible"]]
+        rows = csv_rows.get(page, 0)
+        status = []
+
+        if text_layers < rows:
+            status.append(f"{rows - text_layers} text layers missing")
+
+        if hidden:
+            status.append(f"hidden : {', '.join(hidden)}")
+
+        if common_size and (result["width"], result["height"]) != common_size[0][0]:
+            status.append("size differs")
+
+        if common_mode and result["mode"] != common_mode[0][0]:
+            status.append("mode differs")
+
+        issues += bool(status)
+        size = f"{result['width']}x{result['height']}"
+        print(
+            f"<=> | {page:>{col_size[0]}} | {filename[:col_size[1]]:<{col_size[1]}} | {size:>{col_size[2]}} "
+            f"| {result['mode']:<{col_size[3]}} | {text_layers:>{col_size[4]}} | {rows:>{col_size[5]}} "
+            f"| {len(hidden):>{col_size[6]}} | {'; '.join(status) or 'OK'}"
+        )
+
+    display_message(
+        "SUCCESS" if not issues else "ERROR",
+        f"{len(files)} PSD files read in {elapsed:.2f} s; {issues} with issues.",
+    )
+
+
+if __name__ == "__main__":
+    welcome_sequence([mod_name, f"ver {mod_ver} {date}", email])
+
+    print(input("\n>>> Press enter to continue ..."))
+
+    confirm_exit = False
+
+    while not confirm_exit:
+        with metrics.operation(inspect_psd_folder.__name__):
+            inspect_psd_folder()
+
+        confirm_exit = continue_sequence()
@@ -0,0 +1,480 @@
+"""
+Content-addressed store of clean working PSD files, shared by the language chapters of the same title.
+Each file is kept once, under its SHA-256 digest, in the folder ".ts_store" of the PROJECTS folder :
+    PROJECTS/.ts_store/{digest[:2]}/{digest}.psd
+Chapter folders receive a reflink (copy-on-write clone; Btrfs, XFS, APFS) of the stored file. The store is
+only used where the file system supports reflinks (see supports_reflink()); elsewhere, a private copy per chapter
+and another in the store would take more space, and time, than plain copies.
+Digests of source files are cached by path, size, and modification time, so unchanged sources are not read again.
+Run this file to display the disk space saved, and copy time avoided, per title; to verify the store; and to detach
+the read-only hardlinks placed by earlier versions.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import sys
+import threading
+import time
+
+import metrics
+from lib import (
+    copy_file,
+    display_message,
+    display_path_desc,
+    file_hash,
+    identify_path,
+    parse_path,
+)
+
+store_folder = ".ts_store"
+staging_folder = ".staging"  # Copies in progress, named after the source path, size, and modification time.
+index_name = "index.json"
+default_rate = (
+    50e6  # Bytes per second, assumed for copy time avoided until a copy is measured.
+)
+
+_lock = threading.RLock()
+_indexes = {}  # Loaded indexes, by store path.
+_reflinks = {}  # Whether reflinks are supported, by store path.
+
+
+def store_path(title_path: str) -> str:
+    """
+    The store is kept in the PROJECTS folder, ie the parent of the title folders;
+    on the same file system as the chapter folders, as required by links.
+    :param title_path: The title folder
+    :return: The path of the store
+    """
+    return os.path.join(os.path.dirname(title_path), store_folder)
+
+
+def object_path(store: str, digest: str) -> str:
+    return os.path.join(store, digest[:2], f"{digest}.psd")
+
+
+def load_index(store: str) -> dict:
+    with _lock:
+        if store not in _indexes:
+            index = {
+                "objects": {},
+                "links": {},
+                "sources": {},
+                "copy": {"bytes": 0, "seconds": 0.0},
+            }
+            filepath = os.path.join(store, index_name)
+
+            if os.path.exists(filepath):
+                with open(filepath, encoding="utf-8") as file:
+                    index.update(json.load(file))
+
+            _indexes[store] = index
+
+        return _indexes[store]
+
+
+def save_index(store: str) -> None:
+    index = load_index(store)
+    filepath = os.path.join(store, index_name)
+
+    with _lock:
+        with open(f"{filepath}.tmp", "w", encoding="utf-8") as file:
+            json.dump(index, file, indent=1)
+
+        os.replace(f"{filepath}.tmp", filepath)
+
+
+def source_key(path_src: str) -> tuple:
+    """
+    :return: (absolute path, stat) of a source file
+    """
+    return os.path.abspath(path_src), os.stat(path_src)
+
+
+def cached_digest(store: str, path_src: str) -> str:
+    """
+    The digest of a source file, if cached, and the file is unchanged since; empty string otherwise.
+    """
+    key, stat_src = source_key(path_src)
+
+    with _lock:
+        cached = load_index(store)["sources"].get(key)
+
+    if (
+        cached
+        and cached["size"] == stat_src.st_size
+        and cached["mtime_ns"] == stat_src.st_mtime_ns
+    ):
+        return cached["digest"]
+
+    return ""
+
+
+def remember_digest(store: str, path_src: str, digest: str) -> None:
+    key, stat_src = source_key(path_src)
+
+    with _lock:
+        load_index(store)["sources"][key] = {
+            "size": stat_src.st_size,
+            "mtime_ns": stat_src.st_mtime_ns,
+            "digest": digest,
+        }
+
+
+def source_digest(store: str, path_src: str) -> str:
+    """
+    The digest of a source file; from the cache if unchanged, otherwise read, and cached.
+    """
+    digest = cached_digest(store, path_src)
+
+    if not digest:
+        digest = file_hash(path_src)
+        remember_digest(store, path_src, digest)
+
+    return digest
+
+
+def matches(store: str, path_dst: str, digest: str) -> bool:
+    """
+    Check whether a file in a chapter folder has the contents of a stored file; without reading it,
+    if linked from the store, and unmodified since.
+    """
+    with _lock:
+        record = load_index(store)["links"].get(path_dst)
+
+    if (
+        record
+        and record["digest"] == digest
+        and is_linked(path_dst, object_path(store, digest), record)
+    ):
+        return True
+
+    return file_hash(path_dst) == digest
+
+
+def ingest(store: str, path_src: str) -> tuple:
+    """
+    Add a file to the store, unless already stored. The source is read once, by the copy; the digest is of the
+    local copy. An interrupted copy (staging *.part file, of the same source path, size, and modification time)
+    is resumed, so that only the rest of the source is read. The stored file is made read-only.
+    :param store: The path of the store
+    :param path_src: The path of the source file
+    :return: (digest, number of bytes copied, True if resumed)
+    """
+    index = load_index(store)
+    digest = cached_digest(store, path_src)
+
+    if digest and os.path.exists(object_path(store, digest)):
+        return digest, 0, False
+
+    key, stat_src = source_key(path_src)
+    staging_name = hashlib.sha1(
+        f"{key}|{stat_src.st_size}|{stat_src.st_mtime_ns}".encode("utf-8")
+    ).hexdigest()
+    path_part = os.path.join(store, staging_folder, f"{staging_name}.part")
+    os.makedirs(os.path.dirname(path_part), exist_ok=True)
+    size = stat_src.st_size
+    offset = os.path.getsize(path_part) if os.path.exists(path_part) else 0
+    offset = offset if offset <= size else 0
+    start = time.perf_counter()
+    copied = copy_file(path_src, path_part, offset)
+    elapsed = time.perf_counter() - start
+    digest = file_hash(path_part)
+    remember_digest(store, path_src, digest)
+    path_obj = object_path(store, digest)
+
+    if os.path.exists(path_obj):  # The same file, from another source path.
+        os.remove(path_part)
+    else:
+        os.makedirs(os.path.dirname(path_obj), exist_ok=True)
+        os.chmod(path_part, stat.S_IREAD)
+        os.replace(path_part, path_obj)
+
+    with _lock:
+        index["objects"][digest] = {"size": size}
+        index["copy"]["bytes"] += copied
+        index["copy"]["seconds"] += elapsed
+
+    return digest, copied, bool(offset)
+
+
+def reflink(path_src: str, path_dst: str) -> None:
+    """
+    Clone a file (copy-on-write); raises OSError where not supported by the OS, or the file system.
+    """
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        ficlone = 0x40049409  # FICLONE ioctl request, from linux/fs.h.
+
+        with open(path_src, "rb") as file_src, open(path_dst, "wb") as file_dst:
+            fcntl.ioctl(file_dst.fileno(), ficlone, file_src.fileno())
+
+    elif sys.platform == "darwin":
+        import ctypes
+
+        libc = ctypes.CDLL("libc.dylib", use_errno=True)
+
+        if libc.clonefile(os.fsencode(path_src), os.fsencode(path_dst), 0):
+            raise OSError(ctypes.get_errno(), "clonefile failed")
+
+    else:
+        raise OSError("Reflinks not supported.")
+
+
+def supports_reflink(store: str) -> bool:
+    """
+    Check, once per store, whether the file system of the store supports reflinks; by cloning a small probe file.
+    An empty store folder is removed if not.
+    """
+    with _lock:
+        if store not in _reflinks:
+            created = not os.path.isdir(store)
+            os.makedirs(store, exist_ok=True)
+            probe = os.path.join(store, ".probe")
+
+            try:
+                with open(probe, "wb") as file:
+                    file.write(b"\0" * 4096)
+
+                reflink(probe, f"{probe}.clone")
+                _reflinks[store] = True
+
+            except OSError:
+                _reflinks[store] = False
+
+            finally:
+                for path in (probe, f"{probe}.clone"):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+            if created and not _reflinks[store]:
+                os.rmdir(store)
+
+        return _reflinks[store]
+
+
+def link(store: str, digest: str, path_dst: str) -> str:
+    """
+    Place a stored file in a chapter folder; reflink, else a private copy. An existing file is never replaced.
+    :param store: The path of the store
+    :param digest: The digest of the stored file
+    :param path_dst: The path of the file in the chapter folder
+    :return: The method used; "reflink", or "copy"
+    """
+    if os.path.exists(path_dst):
+        raise FileExistsError(f"{os.path.basename(path_dst)} already exists.")
+
+    path_obj = object_path(store, digest)
+    path_tmp = f"{path_dst}.link"
+
+    if os.path.exists(path_tmp):
+        os.remove(path_tmp)
+
+    try:
+        reflink(path_obj, path_tmp)
+        os.chmod(path_tmp, stat.S_IREAD | stat.S_IWRITE)
+        mode = "reflink"
+
+    except OSError:  # Eg not supported by the file system.
+        if os.path.exists(path_tmp):
+            os.remove(path_tmp)
+
+        copy_file(path_obj, path_tmp)
+        os.chmod(path_tmp, stat.S_IREAD | stat.S_IWRITE)
+        mode = "copy"
+
+    os.replace(path_tmp, path_dst)
+    metrics.count(f"files_{mode}")
+
+    with _lock:
+        load_index(store)["links"][path_dst] = {
+            "digest": digest,
+            "mode": mode,
+            "mtime_ns": os.stat(path_dst).st_mtime_ns,
+        }
+
+    return mode
+
+
+def is_linked(path_dst: str, path_obj: str, record: dict) -> bool:
+    """
+    Check whether a file in a chapter folder still shares its data with the stored file.
+    """
+    if not os.path.exists(path_dst) or not os.path.exists(path_obj):
+        return False
+
+    match record["mode"]:
+        case "hardlink":
+            return os.path.samefile(path_dst, path_obj)
+        case "reflink":  # Unmodified since linked.
+            return os.stat(path_dst).st_mtime_ns == record["mtime_ns"]
+        case _:
+            return False
+
+
+def detach(folder: str) -> int:
+    """
+    Replace the hardlinks in a folder, placed by earlier versions, by private, writable copies.
+    Reflinks are already copy-on-write.
+    :param folder: The folder of the PSD files, eg ".../CH1/2 TYPESETTING"
+    :return: The number of files detached
+    """
+    if not os.path.isdir(folder):
+        return 0
+
+    store = store_path(os.path.dirname(os.path.dirname(folder)))
+    detached = 0
+
+    for item in os.listdir(folder):
+        path_dst = os.path.join(folder, item)
+
+        if not os.path.isfile(path_dst) or os.stat(path_dst).st_nlink < 2:
+            continue
+
+        path_tmp = f"{path_dst}.detach"
+        copy_file(path_dst, path_tmp)
+        os.chmod(path_tmp, stat.S_IREAD | stat.S_IWRITE)
+        replace(store, path_tmp, path_dst)
+
+        with _lock:
+            record = load_index(store)["links"].get(path_dst)
+
+            if record:
+                record["mode"] = "detached"
+
+        detached += 1
+
+    if detached:
+        save_index(store)
+
+    return detached
+
+
+def replace(store: str, path_tmp: str, path_dst: str) -> None:
+    """
+    Replace a file in a chapter folder, which may be a read-only hardlink to a stored file;
+    read-only files cannot be replaced on Windows. The stored file is made read-only again.
+    """
+    if os.name == "nt" and os.path.exists(path_dst):
+        with _lock:
+            record = load_index(store)["links"].get(path_dst)
+
+        os.chmod(path_dst, stat.S_IREAD | stat.S_IWRITE)
+        os.replace(path_tmp, path_dst)
+
+        if record and os.path.exists(object_path(store, record["digest"])):
+            os.chmod(object_path(store, record["digest"]), stat.S_IREAD)
+    else:
+        os.replace(path_tmp, path_dst)
+
+
+def show_report(projects_path: str, verify: bool = False) -> None:
+    """
+    Display the disk space saved, and the copy time avoided, per title, by links to the store.
+    :param projects_path: The PROJECTS folder, parent of the store
+    :param verify: True to check the integrity of each stored file against its digest
+    """
+    store = os.path.join(projects_path, store_folder)
+
+    if not os.path.isdir(store):
+        print("\n<=> No store found.")
+        return
+
+    index = load_index(store)
+    copy = index["copy"]
+    rate = copy["bytes"] / copy["seconds"] if copy["seconds"] else default_rate
+    titles = {}
+    linked_digests = set()
+
+    # Only the links beyond the first of each stored file save space, and a copy; the first is the only copy.
+    for path_dst, record in sorted(index["links"].items()):
+        digest = record["digest"]
+        size = index["objects"].get(digest, {}).get("size", 0)
+        title, language, _ = parse_path(path_dst)
+        key = (title or "-", language or "-")
+        linked, saved = titles.get(key, (0, 0))
+
+        if not is_linked(path_dst, object_path(store, digest), record):
+            titles[key] = (linked, saved)
+        elif digest in linked_digests:
+            titles[key] = (linked + 1, saved + size)
+        else:
+            linked_digests.add(digest)
+            titles[key] = (linked + 1, saved)
+
+    col_size = [24, 4, 8, 10, 10]
+
+    print(f"\n<=> Store Report (copy rate {rate / 1e6:,.1f} MB/s) :")
+    print(
+        f"<=> | {'Title':<{col_size[0]}} | {'Lang':<{col_size[1]}} | {'Linked':>{col_size[2]}} "
+        f"| {'Saved MB':>{col_size[3]}} | {'Avoided s':>{col_size[4]}} |"
+    )
+
+    for (title, language), (linked, saved) in sorted(titles.items()):
+        print(
+            f"<=> | {title[:col_size[0]]:<{col_size[0]}} | {language:<{col_size[1]}} | {linked:>{col_size[2]}} "
+            f"| {saved / 1e6:>{col_size[3]},.1f} | {saved / rate:>{col_size[4]},.1f} |"
+        )
+
+    stored = sum(obj["size"] for obj in index["objects"].values())
+    # Stored files no longer linked to any chapter take space, without saving any.
+    unlinked = sum(
+        obj["size"]
+        for digest, obj in index["objects"].items()
+        if digest not in linked_digests
+    )
+    total_saved = sum(saved for _, saved in titles.values())
+
+    print(f"<=>  Store size : {stored / 1e6:,.1f} MB ({len(index['objects'])} files)")
+    print(f"<=>  Net saved  : {(total_saved - unlinked) / 1e6:,.1f} MB")
+
+    if verify:
+        corrupted = [
+            digest
+            for digest in index["objects"]
+            if not os.path.exists(object_path(store, digest))
+            or file_hash(object_path(store, digest)) != digest
+        ]
+
+        if corrupted:
+            display_message(
+                "ERROR",
+                f"{len(corrupted)} stored files missing, or not matching their digests.",
+                "\n<=>  ".join(digest[:12] for digest in corrupted),
+            )
+        else:
+            display_message("SUCCESS", "All stored files match their digests.")
+
+
+if __name__ == "__main__":
+    print(">>> Select PROJECTS folder ...")
+
+    path = identify_path("folder")
+
+    if path:
+        projects_path = os.path.normpath(path)
+        display_path_desc(projects_path, "folder")
+        show_report(projects_path, verify=True)
+
+        # Chapters linked by earlier versions, with read-only hardlinks shared with the store.
+        store = os.path.join(projects_path, store_folder)
+        folders = sorted(
+            {
+                os.path.dirname(path_dst)
+                for path_dst, record in load_index(store)["links"].items()
+                if record["mode"] == "hardlink"
+            }
+            if os.path.isdir(store)
+            else set()
+        )
+
+        if folders:
+            print(
+                f"\n>>> Detach hardlinks in {len(folders)} folders ? Enter [Y]es to detach."
+            )
+
+            if input(">>> ").upper() == "Y":
+                detached = sum(detach(folder) for folder in folders)
+                display_message("SUCCESS", f"{detached} PSD files detached.")